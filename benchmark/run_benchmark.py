@@ -1,40 +1,258 @@
-from marisol import Marisol
-from tests.mocks import MockPDF
+"""
+Marisol benchmark suite.
 
-import time
+Runs a matrix of scenarios against corpora generated with tests.mocks.MockPDF and records throughput, per-document
+latency and peak memory for each.  Every scenario runs in a fresh process so that its peak RSS is its own.
+
+    python benchmark/run_benchmark.py                            # run everything, print a summary
+    python benchmark/run_benchmark.py --quick -o results.json    # smaller corpora, save the results
+    python benchmark/run_benchmark.py --compare baseline.json    # flag regressions against stored results
+"""
+from reportlab.lib import pagesizes
+
+import argparse
+import importlib.util
+import json
+import math
+import multiprocessing
 import os
+import platform
+import sys
+import tempfile
+import time
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-if __name__ == "__main__":
+from marisol import Area, Marisol, Redaction, RedactionStyle, StaticOverlay  # noqa: E402
+from tests.mocks import MockPDF  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+def corpus(documents, pages, sizes=(pagesizes.letter, )):
+    """
+    Describe a corpus of generated PDFs.
+
+    Args:
+        documents (int): Number of documents.
+        pages (int): Pages per document.
+        sizes (tuple): Page sizes, used in turn for each document.
+
+    Returns:
+        list: (pages, size) of each document.
+    """
+    return [(pages, sizes[num % len(sizes)]) for num in range(documents)]
+
+
+def scenarios(quick=False):
+    """
+    The benchmark matrix.
+
+    Args:
+        quick (bool): Use corpora a tenth of the full size.
+
+    Returns:
+        dict: scenario name to scenario settings.
+    """
+    scale = 10 if quick else 1
+    mixed = (pagesizes.letter, pagesizes.legal, pagesizes.A4, pagesizes.landscape(pagesizes.letter), pagesizes.A3)
+    matrix = {
+        "many_small": {"corpus": corpus(2000 // scale, 1)},
+        "few_huge": {"corpus": corpus(2, 1000 // scale)},
+        "mixed_sizes": {"corpus": corpus(500 // scale, 3, mixed)},
+        "redactions": {"corpus": corpus(100 // scale, 5), "redactions": 20},
+        "static_overlay": {"corpus": corpus(500 // scale, 2), "overlay": "CONFIDENTIAL"},
+    }
+    backends = ["pypdf2"]
+    if importlib.util.find_spec("pypdf") is not None:  # optional, see setup.py
+        backends.append("pypdf")
+    for backend in backends:
+        matrix["backend_{}".format(backend)] = {"corpus": corpus(500 // scale, 2), "backend": backend}
+        matrix["backend_{}_huge".format(backend)] = {"corpus": corpus(2, 1000 // scale), "backend": backend}
+    for threads in (1, 2, 4, 8, 16):
+        matrix["threads_{}".format(threads)] = {"corpus": corpus(1000 // scale, 1), "threads": threads}
+    return matrix
+
+
+def percentile(values, fraction):
+    """
+    Nearest-rank percentile.
+    """
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def peak_rss():
+    """
+    Peak resident set size of this process in MiB, or None where it can not be measured.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KiB elsewhere
+
+
+def run_scenario(settings):
+    """
+    Generate the corpus of a scenario and stamp it.  Runs in its own process.
 
-    print("Creating test files...")
-    file_names = []
-    for num in range(1, 5001):
-        bates_number = str(num).zfill(6)
-        file_name = "TESTIN{}.pdf".format(bates_number)
-        file_names.append(file_name)
+    Args:
+        settings (dict): scenario settings
 
-    p = MockPDF(1)
-    for file_name in file_names:
-        with open(file_name, "wb") as out_file:
-            out_file.write(p.read())
+    Returns:
+        dict: measurements
+    """
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        file_names = []
+        cache = {}
+        for num, (pages, size) in enumerate(settings["corpus"]):
+            if (pages, size) not in cache:
+                cache[(pages, size)] = MockPDF(pages, size).read()
+            file_name = "IN{:06d}.pdf".format(num)
+            with open(file_name, "wb") as out_file:
+                out_file.write(cache[(pages, size)])
+            file_names.append(file_name)
+        del cache
 
-    print("Starting Benchmark...")
-    start = time.perf_counter()
+        start = time.perf_counter()
+        m = Marisol("OUT", 8, 1, backend=settings.get("backend"))
+        for file_name in file_names:
+            m.append(file_name)
+        for document in m.documents:
+            if "overlay" in settings:
+                document.add_overlay(StaticOverlay(settings["overlay"], Area.TOP_LEFT))
+            for page in document.pages:
+                for num in range(settings.get("redactions", 0)):
+                    redaction = Redaction((20 + num * 5, 20 + num * 30), (100, 20), "PRIV", RedactionStyle.OUTLINE)
+                    page.add_redaction(redaction)
+        loaded = time.perf_counter()
+        results, stats = m.save(threads=settings.get("threads", multiprocessing.cpu_count() * 6), stats=True)
+        end = time.perf_counter()
 
-    m = Marisol("TESTOUT", 6, 1)
-    for file_name in file_names:
-        m.append(file_name)
+        output_bytes = sum(os.path.getsize(file_name) for file_name, success in results if success)
+        os.chdir(cwd)
 
-    m.save()
+    pages = sum(pages for pages, size in settings["corpus"])
+    latencies = [document.seconds for document in stats.documents]
+    return {"documents": len(settings["corpus"]),
+            "pages": pages,
+            "load_seconds": loaded - start,
+            "seconds": end - start,
+            "pages_per_second": pages / (end - start),
+            "latency_p50": percentile(latencies, 0.50),
+            "latency_p99": percentile(latencies, 0.99),
+            "stage_seconds": dict(stats.timings),
+            "peak_rss_mib": peak_rss(),
+            "output_bytes": output_bytes,
+            "failures": sum(1 for file_name, success in results if not success)}
 
-    end = time.perf_counter()
-    print("Benchmark Complete.")
 
-    print("{} seconds elapsed.".format(end-start))
-    print("{} pages per second.".format(5000/(end-start)))
+def run(names, quick=False):
+    """
+    Run scenarios, each in a fresh process.
 
-    print("Cleaning up...")
-    for file_name in os.listdir():
-        if file_name[-4:] == ".pdf":
-            os.remove(file_name)
+    Args:
+        names (list): scenarios to run, or None for all of them
+        quick (bool): use smaller corpora
+
+    Returns:
+        dict: results in the format written to JSON
+    """
+    matrix = scenarios(quick)
+    context = multiprocessing.get_context("spawn")
+    results = {}
+    for name in names or matrix:
+        print("Running {}...".format(name), file=sys.stderr)
+        with context.Pool(1) as pool:
+            results[name] = pool.apply(run_scenario, (matrix[name], ))
+    return {"python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": multiprocessing.cpu_count(),
+            "quick": quick,
+            "scenarios": results}
+
+
+# metric name, True when higher is better
+METRICS = (("pages_per_second", True), ("latency_p50", False), ("latency_p99", False), ("peak_rss_mib", False))
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare results with a stored baseline.
+
+    Args:
+        results (dict): results of this run
+        baseline (dict): stored results
+        threshold (float): relative change tolerated before a metric counts as a regression
+
+    Returns:
+        list: (scenario, metric, baseline value, current value) for each regression
+    """
+    regressions = []
+    for name, current in sorted(results["scenarios"].items()):
+        previous = baseline["scenarios"].get(name)
+        if previous is None:
+            continue
+        for metric, higher_is_better in METRICS:
+            if current.get(metric) is None or not previous.get(metric):
+                continue
+            change = (current[metric] - previous[metric]) / previous[metric]
+            if (-change if higher_is_better else change) > threshold:
+                regressions.append((name, metric, previous[metric], current[metric]))
+    return regressions
+
+
+def report(results):
+    print("{:<20}{:>8}{:>8}{:>12}{:>10}{:>10}{:>10}".format(
+        "scenario", "docs", "pages", "pages/sec", "p50 ms", "p99 ms", "RSS MiB"))
+    for name, r in results["scenarios"].items():
+        print("{:<20}{:>8}{:>8}{:>12.1f}{:>10.1f}{:>10.1f}{:>10}".format(
+            name, r["documents"], r["pages"], r["pages_per_second"], r["latency_p50"] * 1000,
+            r["latency_p99"] * 1000, "-" if r["peak_rss_mib"] is None else "{:.1f}".format(r["peak_rss_mib"])))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Marisol benchmark suite")
+    parser.add_argument("scenarios", nargs="*", help="scenarios to run (default: all)")
+    parser.add_argument("--list", action="store_true", help="list the scenarios and exit")
+    parser.add_argument("--quick", action="store_true", help="use corpora a tenth of the full size")
+    parser.add_argument("-o", "--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", metavar="BASELINE", help="flag regressions against this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="relative change counted as a regression (default: 0.10)")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(scenarios()))
+        return 0
+
+    unknown = set(args.scenarios) - set(scenarios())
+    if unknown:
+        parser.error("unknown scenarios: {}".format(", ".join(sorted(unknown))))
+
+    results = run(args.scenarios, args.quick)
+    report(results)
+
+    if args.output:
+        with open(args.output, "w") as out_file:
+            json.dump(results, out_file, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as in_file:
+            baseline = json.load(in_file)
+        regressions = compare(results, baseline, args.threshold)
+        for name, metric, previous, current in regressions:
+            print("REGRESSION {} {}: {:.4g} -> {:.4g}".format(name, metric, previous, current))
+        if regressions:
+            return 1
+        print("No regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
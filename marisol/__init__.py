@@ -1,7 +1,54 @@
-from .marisol import Area, BatesOverlay, Document, Marisol, OutsideBoundariesError, Page, Redaction, RedactionStyle, \
-    StaticOverlay
+import importlib
 
 __author__ = "Kevin Schellenberg"
 __email__ = "wikkiewikkie@gmail.com"
 __license__ = "MIT"
 __version__ = "0.3.0"
+
+# Public names and the modules they live in.  Modules are imported when one of their names is first used, through the
+# module __getattr__ of PEP 562 (hence Python 3.7 or later), so that importing the package (or running the command
+# line with --help) does not load PyPDF2 and reportlab.
+_EXPORTS = {
+    "Area": "marisol",
+    "BatesOverlay": "marisol",
+    "Document": "marisol",
+    "Marisol": "marisol",
+    "OutsideBoundariesError": "marisol",
+    "Page": "marisol",
+    "Redaction": "marisol",
+    "RedactionImportError": "marisol",
+    "RedactionStyle": "marisol",
+    "StaticOverlay": "marisol",
+    "stamp_cache_info": "marisol",
+    "Backend": "backends",
+    "PyPDF2Backend": "backends",
+    "PypdfBackend": "backends",
+    "get_backend": "backends",
+    "DocumentCache": "cache",
+    "BatesIndex": "index",
+    "Journal": "journal",
+    "LoadFile": "loadfile",
+    "Plan": "plan",
+    "DirectorySink": "sinks",
+    "MemorySink": "sinks",
+    "Sink": "sinks",
+    "TarSink": "sinks",
+    "ZipSink": "sinks",
+    "DocumentStats": "stats",
+    "PageStats": "stats",
+    "SaveStats": "stats",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    value = getattr(importlib.import_module("." + _EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,6 @@
+from .cli import main
+
+import sys
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1009 @@
+from PyPDF2 import PdfFileReader, PdfFileWriter
+from PyPDF2.generic import ArrayObject, DecodedStreamObject, DictionaryObject, EncodedStreamObject, FloatObject, \
+    IndirectObject, NameObject, NumberObject, StreamObject
+from PyPDF2.pdf import PageObject
+
+import importlib
+import io
+import zlib
+
+pypdf = None  # imported when the pypdf backend is first used, it takes about as long to import as the rest of Marisol
+
+
+class Backend(object):
+    """
+    The PDF library Marisol reads, stamps and writes PDFs with.  Marisol works out what to draw on each page, as PDF
+    drawing operators, or as a one-page PDF drawn with reportlab for overlays it can not draw itself, and the backend
+    puts it on the pages and writes the output file.  Backends hold no state of their own, so documents can take them
+    along to worker processes.
+    """
+
+    name = None
+
+    def read(self, file):
+        """
+        Parse a PDF.
+
+        Args:
+            file (file-like object): The PDF.
+
+        Returns:
+            The reader.
+        """
+        raise NotImplementedError
+
+    def pages(self, reader):
+        """
+        Returns:
+            list: The pages of a parsed PDF.
+        """
+        raise NotImplementedError
+
+    def page_size(self, page):
+        """
+        Returns:
+            (float, float): Width and height of a page.
+        """
+        raise NotImplementedError
+
+    def encrypted(self, reader):
+        """
+        Returns:
+            bool: Whether a parsed PDF is encrypted.
+        """
+        raise NotImplementedError
+
+    def content(self, page):
+        """
+        The content of a page decoded and wrapped in q/Q, to be cached and stamped with `stamp`.
+
+        Returns:
+            bytes
+        """
+        raise NotImplementedError
+
+    def output(self, reader=None):
+        """
+        Start an output file.
+
+        Args:
+            reader: Parsed PDF to write an incremental update of, instead of a new file.
+
+        Returns:
+            The output, or None when the backend can not write incremental updates.
+        """
+        raise NotImplementedError
+
+    def stamp(self, output, page, operators, append_only=False, content=None, compress=None):
+        """
+        Stamp a copy of a page with drawing operators and add it to an output file.  The page itself is not changed.
+
+        Args:
+            output: Output file to add the stamped page to, or None for a page that is not written.
+            page: The page.
+            operators (bytes or list): Content stream to draw on the page, or a list of (operators, shared) parts of
+                it.  Shared parts are drawn once into a Form XObject of the output file that every page drawing the
+                same operators invokes, see `_draw`.
+            append_only (bool): Add the operators as an extra content stream, keeping the original streams as they
+                are, instead of merging them.
+            content (bytes): The content of the page from `content`, so that it is not decoded again.
+            compress (int): zlib level to Flate-compress the new content streams of the page at, if any.
+
+        Returns:
+            The stamped page.
+        """
+        raise NotImplementedError
+
+    def overlay(self, data):
+        """
+        Parse an overlay drawn with reportlab.
+
+        Args:
+            data (bytes): One-page PDF.
+
+        Returns:
+            The overlay page.
+        """
+        raise NotImplementedError
+
+    def merge(self, output, page, overlay, compress=None):
+        """
+        Merge an overlay page from `overlay` onto a copy of a page and add it to an output file, as `stamp` does.
+        """
+        raise NotImplementedError
+
+    def add_page(self, output, page):
+        """
+        Add a page, already stamped, to an output file.
+        """
+        raise NotImplementedError
+
+    def writable(self, output):
+        """
+        Returns:
+            bool: Whether an incremental update can be written, because every stamped page only refers to objects of
+                the original file or of the update.
+        """
+        return False
+
+    def write(self, output, out_file, data=None, object_streams=False, compress=None):
+        """
+        Write an output file.
+
+        Args:
+            output: The output file.
+            out_file (file-like object): Stream to write to.
+            data (bytes-like object): The original PDF, for an incremental update.
+            object_streams (bool): Pack the objects other than streams into compressed object streams, where the
+                backend supports it.
+            compress (int): zlib level for the object streams.
+        """
+        raise NotImplementedError
+
+
+class PyPDF2Backend(Backend):
+    """
+    The default backend, built on PyPDF2 1.26.  Supports incremental updates and object streams.
+    """
+
+    name = "pypdf2"
+
+    def read(self, file):
+        return PdfFileReader(file)
+
+    def pages(self, reader):
+        return list(reader.pages)
+
+    def page_size(self, page):
+        return float(page.mediaBox.lowerRight[0]), float(page.mediaBox.upperRight[1])
+
+    def encrypted(self, reader):
+        return reader.isEncrypted
+
+    def content(self, page):
+        contents = page.getContents()
+        return b"" if contents is None else PageObject._pushPopGS(contents, page.pdf).getData()
+
+    def output(self, reader=None):
+        return _Output(reader)
+
+    def stamp(self, output, page, operators, append_only=False, content=None, compress=None):
+        stamped = PageObject(page.pdf, page.indirectRef)
+        stamped.update(page)
+        resources = None if output is None else output.resources
+        forms = ()
+        if not isinstance(operators, bytes):
+            operators, forms = _draw(operators, resources, self.page_size(page), compress)
+        if append_only:
+            _append_contents(stamped, operators, resources, forms)
+        elif content is not None:
+            _merge_contents(stamped, content, operators, resources, forms)
+        else:
+            width, height = self.page_size(page)
+            stamped.mergePage(_overlay_page(width, height, operators, resources, forms))
+        return self._finish(output, stamped, compress)
+
+    def overlay(self, data):
+        return PdfFileReader(io.BytesIO(data)).getPage(0)
+
+    def merge(self, output, page, overlay, compress=None):
+        stamped = PageObject(page.pdf, page.indirectRef)
+        stamped.update(page)
+        stamped.mergePage(overlay)
+        return self._finish(output, stamped, compress)
+
+    def add_page(self, output, page):
+        output.add(page)
+
+    def writable(self, output):
+        pdfs = (output.update.reader, output.update)
+        return all(page.indirectRef is not None and _is_local(page, pdfs) for page in output.pages)
+
+    def write(self, output, out_file, data=None, object_streams=False, compress=None):
+        if output.update is not None:
+            _write_incremental(out_file, data, output.update, output.pages)
+        else:
+            _write(output.writer, out_file, object_streams, compress)
+
+    @staticmethod
+    def _finish(output, page, compress):
+        if compress is not None:
+            _compress_contents(page, compress)
+        if output is not None:
+            output.add(page)
+        return page
+
+
+class _Output(object):
+
+    def __init__(self, reader=None):
+        """
+        A PDF being written by the PyPDF2 backend: a new file, or an incremental update of an existing one.
+
+        Args:
+            reader (PyPDF2.PdfFileReader): reader of the PDF to update, if any
+        """
+        if reader is None:
+            self.writer = PdfFileWriter()
+            self.update = None
+            self.resources = _Resources(self.writer._addObject)
+        else:
+            self.writer = None
+            self.update = _Update(reader)
+            self.resources = _Resources(self.update.add)
+        self.pages = []
+
+    def add(self, page):
+        """
+        Add a page to the end of the file.
+        """
+        self.pages.append(page)
+        if self.writer is not None:
+            self.writer.addPage(page)
+
+
+class PypdfBackend(Backend):
+    """
+    Backend built on pypdf, the maintained successor of PyPDF2, which parses and writes large files faster.  pypdf can
+    not write object streams or incremental updates the way Marisol does, so `object_streams` is ignored and
+    incremental saves rewrite the whole file.
+    """
+
+    name = "pypdf"
+
+    def __init__(self):
+        global pypdf
+        if pypdf is None:
+            try:
+                pypdf = importlib.import_module("pypdf")
+            except ImportError:
+                raise ImportError("The pypdf backend needs pypdf, install it with 'pip install pypdf'.")
+
+    def __reduce__(self):
+        return PypdfBackend, ()  # so that worker processes import pypdf too
+
+    def read(self, file):
+        return pypdf.PdfReader(file)
+
+    def pages(self, reader):
+        return list(reader.pages)
+
+    def page_size(self, page):
+        return float(page.mediabox.right), float(page.mediabox.top)
+
+    def encrypted(self, reader):
+        return reader.is_encrypted
+
+    def content(self, page):
+        contents = page.get_contents()
+        return b"" if contents is None else b"q\n" + contents.get_data() + b"\nQ\n"
+
+    def output(self, reader=None):
+        return None if reader is not None else _PypdfOutput()
+
+    def stamp(self, output, page, operators, append_only=False, content=None, compress=None):
+        output = output or _PypdfOutput()
+        forms = ()
+        if not isinstance(operators, bytes):
+            operators, forms = _draw(operators, output, self.page_size(page), compress)
+        stamped = output.writer.add_page(page)
+        if append_only:
+            contents = pypdf.generic.ArrayObject([output.push])
+            original = stamped.raw_get("/Contents") if "/Contents" in stamped else None
+            if original is not None:
+                if isinstance(original.get_object(), pypdf.generic.ArrayObject):
+                    contents.extend(original.get_object())
+                else:
+                    contents.append(original)
+            contents.append(output.stream(b"\nQ\nq\n" + operators + b"\nQ\n", compress))
+        elif content is not None:
+            contents = output.stream(content + b"q\n" + operators + b"\nQ\n", compress)
+        else:
+            width, height = self.page_size(page)
+            overlay = pypdf.PageObject.create_blank_page(None, width, height)
+            overlay[pypdf.generic.NameObject("/Contents")] = output.stream(operators)
+            overlay[pypdf.generic.NameObject("/Resources")] = output.overlay(forms)
+            return self._merge(stamped, overlay, compress)
+        stamped[pypdf.generic.NameObject("/Contents")] = contents
+        stamped[pypdf.generic.NameObject("/Resources")] = output.resources(stamped, forms)
+        return stamped
+
+    def overlay(self, data):
+        return pypdf.PdfReader(io.BytesIO(data)).pages[0]
+
+    def merge(self, output, page, overlay, compress=None):
+        output = output or _PypdfOutput()
+        return self._merge(output.writer.add_page(page), overlay, compress)
+
+    def add_page(self, output, page):
+        output.writer.add_page(page)
+
+    def write(self, output, out_file, data=None, object_streams=False, compress=None):
+        output.writer.write(out_file)
+
+    @staticmethod
+    def _merge(page, overlay, compress):
+        page.merge_page(overlay)
+        if compress is not None:
+            page.compress_content_streams(compress)
+        return page
+
+
+class _PypdfOutput(object):
+
+    def __init__(self):
+        """
+        A PDF being written by the pypdf backend.  Pages are copied into the writer before they are stamped, so the
+        objects added by stamping live in the writer and are shared by its pages.
+        """
+        self.writer = pypdf.PdfWriter()
+        self._font = None
+        self._push = None
+        self._resources = {}
+        self._forms = {}  # (operators, width, height) to name of the Form XObject drawing them
+        self._xobjects = {}  # name to reference of each Form XObject
+
+    @property
+    def font(self):
+        """
+        Reference to the stamp font.
+        """
+        if self._font is None:
+            generic = pypdf.generic
+            self._font = self.writer._add_object(generic.DictionaryObject({
+                generic.NameObject(key): generic.NameObject(value) for key, value in _FONT.items()}))
+        return self._font
+
+    @property
+    def push(self):
+        """
+        Reference to the content stream saving the graphics state ahead of the original content of a page.
+        """
+        if self._push is None:
+            self._push = self.stream(b"q\n")
+        return self._push
+
+    def stream(self, data, compress=None, entries=None):
+        """
+        Add a content stream to the writer.
+
+        Args:
+            data (bytes): stream data
+            compress (int): zlib level to Flate-compress it at, if any
+            entries (dict): other entries of the stream dictionary
+
+        Returns:
+            pypdf.generic.IndirectObject: reference to the stream
+        """
+        stream = pypdf.generic.DecodedStreamObject()
+        stream.set_data(data)
+        stream.update(entries or {})
+        if compress is not None:
+            stream = stream.flate_encode(compress)
+        return self.writer._add_object(stream)
+
+    def form(self, operators, width, height, compress=None):
+        """
+        Name of the Form XObject drawing operators shared by many pages, added the first time they are drawn on a
+        page of this size.  See `_Resources.form`.
+        """
+        key = (operators, width, height)
+        if key not in self._forms:
+            generic = pypdf.generic
+            name = "{}{}".format(_FORM_NAME, len(self._forms))
+            self._xobjects[name] = self.stream(operators, compress, {
+                generic.NameObject("/Type"): generic.NameObject("/XObject"),
+                generic.NameObject("/Subtype"): generic.NameObject("/Form"),
+                generic.NameObject("/BBox"): generic.ArrayObject(generic.FloatObject(x) for x in (0, 0, width, height)),
+                generic.NameObject("/Resources"): self.overlay()})
+            self._forms[key] = name
+        return self._forms[key]
+
+    def overlay(self, forms=()):
+        """
+        Resource dictionary of an overlay drawn with the stamp font and the given Form XObjects.
+        """
+        generic = pypdf.generic
+        resources = generic.DictionaryObject({
+            generic.NameObject("/Font"): generic.DictionaryObject({generic.NameObject("/" + _FONT_NAME): self.font})})
+        if forms:
+            resources[generic.NameObject("/XObject")] = generic.DictionaryObject({
+                generic.NameObject("/" + name): self._xobjects[name] for name in forms})
+        return resources
+
+    def resources(self, page, forms=()):
+        """
+        Resources of a stamped page: its own resources plus the stamp font and the Form XObjects the stamp invokes,
+        shared by pages that shared a resource dictionary.
+
+        Args:
+            page (pypdf.PageObject): page in the writer
+            forms (tuple): names of the Form XObjects
+
+        Returns:
+            pypdf.generic.PdfObject: resource dictionary or reference to it
+        """
+        generic = pypdf.generic
+        original = page.raw_get("/Resources") if "/Resources" in page else None
+        key = (original.idnum, original.generation, forms) if isinstance(original, generic.IndirectObject) else None
+        if key in self._resources:
+            return self._resources[key]
+
+        resources = generic.DictionaryObject(original.get_object() if original is not None else {})
+        for category, entries in self.overlay(forms).items():
+            merged = resources.get(category)
+            merged = generic.DictionaryObject(merged.get_object() if merged is not None else {})
+            merged.update(entries)
+            resources[category] = merged
+        if key is not None:
+            resources = self._resources[key] = self.writer._add_object(resources)
+        return resources
+
+
+BACKENDS = {PyPDF2Backend.name: PyPDF2Backend, PypdfBackend.name: PypdfBackend}
+
+
+def get_backend(backend=None):
+    """
+    Look up a backend.
+
+    Args:
+        backend (str or Backend): Name of a backend in BACKENDS, or a Backend.  Defaults to "pypdf2".
+
+    Returns:
+        Backend
+
+    Raises:
+        ValueError: When there is no backend with the name.
+        ImportError: When the PDF library of the backend is not installed.
+    """
+    if isinstance(backend, Backend):
+        return backend
+    backend = backend or PyPDF2Backend.name
+    if backend not in BACKENDS:
+        raise ValueError("Unknown backend {}, expected one of {}.".format(backend, ", ".join(sorted(BACKENDS))))
+    return BACKENDS[backend]()
+
+
+# Objects packed into each object stream by `_write_object_streams`.
+_OBJECTS_PER_STREAM = 100
+
+# Standard Helvetica shared by every overlay drawn without reportlab.  Named so it does not collide with page fonts.
+_FONT_NAME = "MarisolHelvetica"
+_FONT = DictionaryObject({NameObject("/Type"): NameObject("/Font"),
+                          NameObject("/Subtype"): NameObject("/Type1"),
+                          NameObject("/BaseFont"): NameObject("/Helvetica"),
+                          NameObject("/Encoding"): NameObject("/WinAnsiEncoding")})
+
+# Form XObjects holding stamps shared by many pages are named this plus a number, see `_draw`.
+_FORM_NAME = "MarisolForm"
+
+
+def _content_stream(operators):
+    """
+    Wrap drawing operators in an uncompressed stream object.
+    """
+    stream = DecodedStreamObject()
+    stream.setData(operators)
+    return stream
+
+
+def _append_contents(page, operators, resources=None, forms=()):
+    """
+    Stamp a page by adding the operators as an extra content stream.  The existing streams are kept by reference and
+    wrapped in q/Q so that any graphics state they leave behind does not affect the stamp.  Only the font used by the
+    stamp is added to the page resources.
+
+    Args:
+        page (PyPDF2.pdf.PageObject): page to stamp
+        operators (bytes): content stream
+        resources (_Resources): shared font and resource objects of the output file, if any
+        forms (tuple): names of the Form XObjects of `resources` the operators invoke
+    """
+    contents = ArrayObject([_content_stream(b"q\n") if resources is None else resources.push])
+    original = page.raw_get("/Contents") if "/Contents" in page else None
+    if original is not None:
+        if isinstance(original.getObject(), ArrayObject):
+            contents.extend(original.getObject())
+        else:
+            contents.append(original)
+    contents.append(_content_stream(b"\nQ\nq\n" + operators + b"\nQ\n"))
+    page[NameObject("/Contents")] = contents
+
+    if resources is None:
+        page[NameObject("/Resources")] = _with_font(page.raw_get("/Resources") if "/Resources" in page else None, _FONT)
+    else:
+        page[NameObject("/Resources")] = resources.page(page, forms)
+
+
+def _merge_contents(page, content, operators, resources=None, forms=()):
+    """
+    Stamp a page the way `mergePage` would, from page content that has already been decoded and wrapped in q/Q (see
+    `DocumentCache`), so that the content is not parsed again for every copy of a document.
+
+    Args:
+        page (PyPDF2.pdf.PageObject): page to stamp
+        content (bytes): the decoded page content
+        operators (bytes): content stream
+        resources (_Resources): shared font and resource objects of the output file, if any
+        forms (tuple): names of the Form XObjects of `resources` the operators invoke
+    """
+    page[NameObject("/Contents")] = _content_stream(content + b"q\n" + operators + b"\nQ\n")
+    if resources is None:
+        page[NameObject("/Resources")] = _with_font(page.raw_get("/Resources") if "/Resources" in page else None, _FONT)
+    else:
+        page[NameObject("/Resources")] = resources.page(page, forms)
+
+
+def _compress_contents(page, level):
+    """
+    Flate-compress the content streams of a stamped page that are not compressed yet.  The original streams of the
+    page are kept by reference, so only the streams added or rewritten by stamping are direct objects here.
+
+    Args:
+        page (PyPDF2.pdf.PageObject): stamped page
+        level (int): zlib compression level
+    """
+    contents = page.raw_get("/Contents") if "/Contents" in page else None
+    if isinstance(contents, ArrayObject):
+        page[NameObject("/Contents")] = ArrayObject(_flate(stream, level) for stream in contents)
+    elif contents is not None:
+        page[NameObject("/Contents")] = _flate(contents, level)
+
+
+def _flate(stream, level):
+    """
+    Flate-compressed copy of a stream object that has no filter.  Anything else is returned as it is.
+
+    Args:
+        stream (PyPDF2.generic.PdfObject): stream to compress
+        level (int): zlib compression level
+
+    Returns:
+        PyPDF2.generic.PdfObject
+    """
+    if not isinstance(stream, StreamObject) or "/Filter" in stream:
+        return stream
+    entries = {key: value for key, value in stream.items() if key != "/Length"}
+    return _flate_stream(stream.getData(), level, entries)
+
+
+def _flate_stream(data, level, entries):
+    """
+    Build a Flate-compressed stream object.
+
+    Args:
+        data (bytes): uncompressed stream data
+        level (int): zlib compression level
+        entries (dict): other entries of the stream dictionary
+
+    Returns:
+        PyPDF2.generic.EncodedStreamObject
+    """
+    stream = EncodedStreamObject()
+    stream.update(entries)
+    stream[NameObject("/Filter")] = NameObject("/FlateDecode")
+    stream._data = zlib.compress(data, level)
+    return stream
+
+
+def _with_font(original, font, xobjects=None):
+    """
+    Copy of a resource dictionary with the stamp font added.
+
+    Args:
+        original (PyPDF2.generic.PdfObject): resource dictionary or reference to one, or None
+        font (PyPDF2.generic.PdfObject): the stamp font or a reference to it
+        xobjects (dict): names and references of Form XObjects to add as well
+
+    Returns:
+        PyPDF2.generic.DictionaryObject: the new resource dictionary
+    """
+    resources = DictionaryObject(original.getObject() if original is not None else {})
+    fonts = resources.get("/Font")
+    fonts = DictionaryObject(fonts.getObject() if fonts is not None else {})
+    fonts[NameObject("/" + _FONT_NAME)] = font
+    resources[NameObject("/Font")] = fonts
+    if xobjects:
+        merged = resources.get("/XObject")
+        merged = DictionaryObject(merged.getObject() if merged is not None else {})
+        merged.update((NameObject("/" + name), reference) for name, reference in xobjects.items())
+        resources[NameObject("/XObject")] = merged
+    return resources
+
+
+def _draw(operators, resources, pagesize, compress=None):
+    """
+    Content stream for the parts of a stamp.  Parts shared by many pages, such as a static overlay or a redaction
+    template, are drawn once into a Form XObject of the output file and invoked by name, so each page only carries
+    the parts of its own, such as its bates number.
+
+    Args:
+        operators (list): (operators, shared) parts of the stamp, in drawing order
+        resources (_Resources or _PypdfOutput): shared objects of the output file, or None to draw every part inline
+        pagesize (tuple): width and height of the page, the bounding box of the forms
+        compress (int): zlib level to Flate-compress new forms at, if any
+
+    Returns:
+        (bytes, tuple): the content stream and the names of the forms it invokes
+    """
+    stream = []
+    forms = []
+    for part, shared in operators:
+        if shared and resources is not None:
+            name = resources.form(part, pagesize[0], pagesize[1], compress)
+            stream.append("q /{} Do Q".format(name).encode("ascii"))
+            if name not in forms:
+                forms.append(name)
+        else:
+            stream.append(part)
+    return b"\n".join(stream), tuple(forms)
+
+
+class _Resources(object):
+
+    def __init__(self, add):
+        """
+        Font and resource dictionaries shared by every page stamped into one output file, so that each is written
+        once instead of once per page.
+
+        Args:
+            add (function): Adds an object to the output file and returns the IndirectObject referring to it.
+        """
+        self.add = add
+        self._font = None
+        self._overlays = {}
+        self._push = None
+        self._pages = {}
+        self._forms = {}  # (operators, width, height) to name of the Form XObject drawing them
+        self._xobjects = {}  # name to reference of each Form XObject
+
+    @property
+    def font(self):
+        """
+        Reference to the stamp font.
+        """
+        if self._font is None:
+            self._font = self.add(_FONT)
+        return self._font
+
+    @property
+    def push(self):
+        """
+        Reference to the content stream saving the graphics state ahead of the original content of a page.
+        """
+        if self._push is None:
+            self._push = self.add(_content_stream(b"q\n"))
+        return self._push
+
+    def form(self, operators, width, height, compress=None):
+        """
+        Name of the Form XObject drawing operators shared by many pages, added the first time they are drawn on a
+        page of this size.  The form draws in the coordinates of the page, so invoking it draws the operators in
+        place.
+
+        Args:
+            operators (bytes): content stream of the form
+            width (float): page width
+            height (float): page height
+            compress (int): zlib level to Flate-compress the form at, if any
+
+        Returns:
+            str: name of the form, without the leading slash
+        """
+        key = (operators, width, height)
+        if key not in self._forms:
+            form = _content_stream(operators)
+            form.update({NameObject("/Type"): NameObject("/XObject"),
+                         NameObject("/Subtype"): NameObject("/Form"),
+                         NameObject("/BBox"): ArrayObject(FloatObject(x) for x in (0, 0, width, height)),
+                         NameObject("/Resources"): _overlay_resources(self.font)})
+            name = "{}{}".format(_FORM_NAME, len(self._forms))
+            self._xobjects[name] = self.add(form if compress is None else _flate(form, compress))
+            self._forms[key] = name
+        return self._forms[key]
+
+    def overlay(self, forms=()):
+        """
+        Reference to the resource dictionary of overlay pages merged onto the document's pages.
+
+        Args:
+            forms (tuple): names of the Form XObjects the overlays invoke
+
+        Returns:
+            PyPDF2.generic.IndirectObject
+        """
+        if forms not in self._overlays:
+            self._overlays[forms] = self.add(_overlay_resources(self.font, self._forms_named(forms)))
+        return self._overlays[forms]
+
+    def page(self, page, forms=()):
+        """
+        Resources of an append-only stamped page: its own resources plus the stamp font and the Form XObjects the
+        stamp invokes.  Pages that shared a resource dictionary in the original file share a single new one.
+
+        Args:
+            page (PyPDF2.pdf.PageObject): the page
+            forms (tuple): names of the Form XObjects
+
+        Returns:
+            PyPDF2.generic.PdfObject: resource dictionary or reference to it
+        """
+        original = page.raw_get("/Resources") if "/Resources" in page else None
+        if not isinstance(original, IndirectObject):
+            return _with_font(original, self.font, self._forms_named(forms))
+        key = (original.idnum, original.generation, forms)
+        if key not in self._pages:
+            self._pages[key] = self.add(_with_font(original, self.font, self._forms_named(forms)))
+        return self._pages[key]
+
+    def _forms_named(self, forms):
+        return {name: self._xobjects[name] for name in forms}
+
+
+def _overlay_resources(font, xobjects=None):
+    """
+    Resource dictionary for overlays drawn with the stamp font, and invoking the given Form XObjects, if any.
+    """
+    resources = DictionaryObject({
+        NameObject("/Font"): DictionaryObject({NameObject("/" + _FONT_NAME): font}),
+        NameObject("/ProcSet"): ArrayObject([NameObject("/PDF"), NameObject("/Text")])})
+    if xobjects:
+        resources[NameObject("/XObject")] = DictionaryObject(
+            (NameObject("/" + name), reference) for name, reference in xobjects.items())
+    return resources
+
+
+def _overlay_page(width, height, operators, resources=None, forms=()):
+    """
+    Build a page holding the given drawing operators, ready to be merged onto a PDF page.
+
+    Args:
+        width (float): page width
+        height (float): page height
+        operators (bytes): content stream
+        resources (_Resources): shared font and resource objects of the output file, if any
+        forms (tuple): names of the Form XObjects of `resources` the operators invoke
+
+    Returns:
+        PyPDF2.pdf.PageObject: The overlay page.
+    """
+    page = PageObject.createBlankPage(None, width, height)
+    page[NameObject("/Contents")] = _content_stream(operators)
+    if resources is None:
+        page[NameObject("/Resources")] = _overlay_resources(_FONT)
+    else:
+        page[NameObject("/Resources")] = resources.overlay(forms)
+    return page
+
+
+def _is_local(obj, pdfs):
+    """
+    Check that no indirect reference in a direct object points outside the given files.
+    """
+    if isinstance(obj, IndirectObject):
+        return any(obj.pdf is pdf for pdf in pdfs)
+    if isinstance(obj, dict):
+        return all(_is_local(value, pdfs) for value in obj.values())
+    if isinstance(obj, list):
+        return all(_is_local(value, pdfs) for value in obj)
+    return True
+
+
+def _externalize(obj, allocate):
+    """
+    Replace the streams held directly in an object with indirect references.  Containers holding streams are copied,
+    the object passed in is not changed.
+
+    Args:
+        obj (PyPDF2.generic.PdfObject): the object
+        allocate (function): called with each stream, returns the IndirectObject to refer to it by
+
+    Returns:
+        PyPDF2.generic.PdfObject: the object, or a copy referring to the streams indirectly
+    """
+    if isinstance(obj, StreamObject):
+        return allocate(obj)
+    if isinstance(obj, DictionaryObject):
+        copied = DictionaryObject()
+        copied.update((key, _externalize(value, allocate)) for key, value in obj.items())
+        return copied
+    if isinstance(obj, ArrayObject):
+        return ArrayObject(_externalize(value, allocate) for value in obj)
+    return obj
+
+
+class _Update(object):
+
+    def __init__(self, reader):
+        """
+        Objects added to a PDF by an incremental update.  Takes the place of the output file when references to them
+        are resolved.
+
+        Args:
+            reader (PyPDF2.PdfFileReader): reader of the original PDF
+        """
+        self.reader = reader
+        ids = set(reader.xref_objStm)
+        for numbers in reader.xref.values():
+            ids.update(numbers)
+        self.size = max(int(reader.trailer.get("/Size", 0)), max(ids, default=0) + 1)
+        self.objects = []  # (reference, object), numbered from the original size up
+
+    def add(self, obj):
+        """
+        Add an object to the update.
+
+        Returns:
+            PyPDF2.generic.IndirectObject: reference to the new object.
+        """
+        reference = IndirectObject(self.size + len(self.objects), 0, self)
+        self.objects.append((reference, obj))
+        return reference
+
+    def getObject(self, reference):
+        return self.objects[reference.idnum - self.size][1]
+
+
+def _write_incremental(out_file, data, update, pages):
+    """
+    Write the original PDF followed by an incremental update section replacing the stamped pages.
+
+    Args:
+        out_file (file-like object): stream to write to
+        data (bytes-like object): original PDF
+        update (_Update): objects added to the PDF
+        pages (list): stamped PyPDF2.pdf.PageObject instances, each still carrying its original indirect reference
+    """
+    reader = update.reader
+    objects = []  # (idnum, generation, object) in the order written
+    for page in pages:
+        updated = _externalize(page, update.add)
+        objects.append((page.indirectRef.idnum, page.indirectRef.generation, updated))
+    objects += [(reference.idnum, 0, obj) for reference, obj in update.objects]
+
+    out_file.write(data)
+    position = len(data)
+    if data[-1:] != b"\n":
+        out_file.write(b"\n")
+        position += 1
+
+    offsets = {}
+    for idnum, generation, obj in objects:
+        offsets[idnum] = (position, generation)
+        chunk = io.BytesIO()
+        chunk.write("{} {} obj\n".format(idnum, generation).encode())
+        obj.writeToStream(chunk, None)
+        chunk.write(b"\nendobj\n")
+        out_file.write(chunk.getvalue())
+        position += len(chunk.getvalue())
+
+    # cross-reference table, one subsection per run of consecutive object numbers.  The entry for object 0 is
+    # repeated so that readers expecting a zero-indexed table do not renumber the objects.
+    out_file.write(b"xref\n0 1\n0000000000 65535 f \n")
+    numbers = sorted(offsets)
+    runs = []
+    for idnum in numbers:
+        if runs and runs[-1][-1] == idnum - 1:
+            runs[-1].append(idnum)
+        else:
+            runs.append([idnum])
+    for run in runs:
+        out_file.write("{} {}\n".format(run[0], len(run)).encode())
+        for idnum in run:
+            out_file.write("{:010d} {:05d} n \n".format(*offsets[idnum]).encode())
+
+    trailer = DictionaryObject({NameObject("/Size"): NumberObject(max(update.size, numbers[-1] + 1)),
+                                NameObject("/Prev"): NumberObject(_startxref(data))})
+    for key in ("/Root", "/Info", "/ID"):
+        if key in reader.trailer:
+            trailer[NameObject(key)] = reader.trailer.raw_get(key)
+    out_file.write(b"trailer\n")
+    trailer.writeToStream(out_file, None)
+    out_file.write("\nstartxref\n{}\n%%EOF\n".format(position).encode())
+
+
+def _write(writer, out_file, object_streams=False, level=None):
+    """
+    Write the PDF of a writer, either as PdfFileWriter.write does or packed into object streams.
+
+    Args:
+        writer (PyPDF2.PdfFileWriter): PDF to write
+        out_file (file-like object): stream to write to
+        object_streams (bool): pack the objects other than streams into object streams, see `_write_object_streams`
+        level (int): zlib compression level of the object and cross-reference streams, or None for zlib's default
+    """
+    if object_streams:
+        _write_object_streams(writer, out_file, zlib.Z_DEFAULT_COMPRESSION if level is None else level)
+    else:
+        writer.write(out_file)
+
+
+def _write_object_streams(writer, out_file, level):
+    """
+    Write the PDF of a writer with the objects other than streams packed into compressed object streams, located
+    through a compressed cross-reference stream instead of a cross-reference table.  Both need PDF 1.5.
+
+    Args:
+        writer (PyPDF2.PdfFileWriter): PDF to write
+        out_file (file-like object): stream to write to
+        level (int): zlib compression level
+    """
+    _sweep(writer)
+    objects = writer._objects
+    packed = [num for num, obj in enumerate(objects, 1) if not isinstance(obj, StreamObject)]
+
+    entries = {}  # object number to cross-reference stream fields: type, offset or object stream, generation or index
+    object_streams = []
+    for first in range(0, len(packed), _OBJECTS_PER_STREAM):
+        numbers = packed[first:first + _OBJECTS_PER_STREAM]
+        stream_num = len(objects) + len(object_streams) + 1
+        offsets = []
+        body = io.BytesIO()
+        for index, num in enumerate(numbers):
+            offsets.append("{} {}".format(num, body.tell()))
+            objects[num - 1].writeToStream(body, None)
+            body.write(b"\n")
+            entries[num] = (2, stream_num, index)
+        header = (" ".join(offsets) + "\n").encode()
+        object_streams.append(_flate_stream(header + body.getvalue(), level, {
+            NameObject("/Type"): NameObject("/ObjStm"),
+            NameObject("/N"): NumberObject(len(numbers)),
+            NameObject("/First"): NumberObject(len(header))}))
+
+    out_file.write(b"%PDF-1.5\n%\xe2\xe3\xcf\xd3\n")
+    written = [(num, obj) for num, obj in enumerate(objects, 1) if isinstance(obj, StreamObject)]
+    written += list(enumerate(object_streams, len(objects) + 1))
+    for num, obj in written:
+        entries[num] = (1, out_file.tell(), 0)
+        out_file.write("{} 0 obj\n".format(num).encode())
+        obj.writeToStream(out_file, None)
+        out_file.write(b"\nendobj\n")
+
+    xref_num = len(objects) + len(object_streams) + 1
+    position = out_file.tell()
+    entries[xref_num] = (1, position, 0)
+    width = max(4, (position.bit_length() + 7) // 8)
+    rows = [bytes([0]) + bytes(width) + (65535).to_bytes(2, "big")]
+    for num in range(1, xref_num + 1):
+        kind, field, index = entries[num]
+        rows.append(bytes([kind]) + field.to_bytes(width, "big") + index.to_bytes(2, "big"))
+    trailer = {NameObject("/Type"): NameObject("/XRef"),
+               NameObject("/Size"): NumberObject(xref_num + 1),
+               NameObject("/W"): ArrayObject([NumberObject(1), NumberObject(width), NumberObject(2)]),
+               NameObject("/Root"): writer._root,
+               NameObject("/Info"): writer._info}
+    if hasattr(writer, "_ID"):
+        trailer[NameObject("/ID")] = writer._ID
+    out_file.write("{} 0 obj\n".format(xref_num).encode())
+    _flate_stream(b"".join(rows), level, trailer).writeToStream(out_file, None)
+    out_file.write("\nendobj\nstartxref\n{}\n%%EOF\n".format(position).encode())
+
+
+def _sweep(writer):
+    """
+    Copy every object the pages of a writer refer to into the writer, as PdfFileWriter.write does before writing.
+    """
+    if not writer._root:
+        writer._root = writer._addObject(writer._root_object)
+    references = {}
+    for num, obj in enumerate(writer._objects, 1):
+        if isinstance(obj, PageObject) and obj.indirectRef is not None:
+            reference = obj.indirectRef
+            references.setdefault(reference.pdf, {}).setdefault(reference.generation, {})[reference.idnum] = \
+                IndirectObject(num, 0, writer)
+    writer.stack = []
+    writer._sweepIndirectReferences(references, writer._root)
+    del writer.stack
+
+
+def _startxref(data):
+    """
+    Offset of the last cross-reference section of a PDF.
+    """
+    tail = bytes(data[-1024:])
+    position = tail.rfind(b"startxref")
+    if position < 0:  # unusually long trailing garbage, search everything
+        tail = bytes(data)
+        position = tail.rfind(b"startxref")
+    return int(tail[position+len(b"startxref"):].split()[0])
@@ -0,0 +1,106 @@
+from collections import OrderedDict
+
+from .backends import get_backend
+
+import hashlib
+import io
+import threading
+
+
+class DocumentCache(object):
+
+    def __init__(self, maxsize=128):
+        """
+        Parsed PDFs shared between documents with the same content, such as an attachment that appears in many emails.
+        Each PDF is parsed once, and the content of each of its pages is decoded once, however many documents it
+        appears in.  When full, the least recently used PDF is dropped.
+
+        Args:
+            maxsize (int): Most PDFs to keep.
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __str__(self):
+        return "{} of {} PDFs, {} hits, {} misses".format(len(self), self.maxsize, self.hits, self.misses)
+
+    def get(self, data, backend=None):
+        """
+        Find the cached PDF with the same content, parsing and adding it if there is none.
+
+        Args:
+            data (bytes-like object): Content of the PDF.
+            backend (str or marisol.Backend): Backend to parse the PDF with.  PDFs parsed by different backends are
+                cached separately.
+
+        Returns:
+            CacheEntry: The cached PDF.
+        """
+        backend = get_backend(backend)
+        key = (backend.name, hashlib.sha256(data).digest())
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                entry = self.entries[key] = CacheEntry(data, backend)
+                if len(self.entries) > self.maxsize:
+                    self.entries.popitem(last=False)
+            else:
+                self.hits += 1
+                self.entries.move_to_end(key)
+        entry.load()  # outside the cache lock, so other PDFs are not held up while this one is parsed
+        return entry
+
+
+class CacheEntry(object):
+
+    def __init__(self, data, backend=None):
+        """
+        A PDF kept in a DocumentCache.  The reader and the page contents are shared by every document with the same
+        content, and readers are not thread-safe, so they are only used while holding `lock`.
+
+        Args:
+            data (bytes-like object): Content of the PDF.
+            backend (str or marisol.Backend): Backend to parse the PDF with.
+        """
+        self.data = bytes(data)
+        self.backend = get_backend(backend)
+        self.reader = None
+        self.pages = None
+        self.contents = {}
+        self.lock = threading.RLock()
+
+    def load(self):
+        """
+        Parse the PDF, if that has not happened yet.
+
+        Returns:
+            The shared reader.
+        """
+        with self.lock:
+            if self.reader is None:
+                self.reader = self.backend.read(io.BytesIO(self.data))
+                self.pages = self.backend.pages(self.reader)
+        return self.reader
+
+    def content(self, index):
+        """
+        The content of a page decoded and wrapped in q/Q, as merging writes it before the content of the page merged
+        onto it.
+
+        Args:
+            index (int): Index of the page.
+
+        Returns:
+            bytes
+        """
+        with self.lock:
+            if index not in self.contents:
+                self.contents[index] = self.backend.content(self.pages[index])
+            return self.contents[index]
@@ -0,0 +1,167 @@
+from . import __version__
+
+import argparse
+import glob
+import json
+import os
+import sys
+
+AREAS = ("top-left", "top-right", "bottom-right", "bottom-left")
+
+
+def main(argv=None):
+    """
+    Entry point of the `marisol` command.  PyPDF2 and reportlab are only imported once there is something to stamp, so
+    `--help` and argument errors return right away.
+
+    Args:
+        argv (list): Command line arguments, without the program name.  Defaults to sys.argv.
+
+    Returns:
+        int: Exit status, 0 when every document was saved and 1 otherwise.
+    """
+    parser = argparse.ArgumentParser(prog="marisol", description="Add bates numbers to PDF files.")
+    parser.add_argument("inputs", nargs="*", help="PDF files, directories of PDF files or glob patterns, numbered in "
+                                                  "the order given and sorted by name within each")
+    parser.add_argument("-p", "--prefix", help="bates number prefix")
+    parser.add_argument("-f", "--fill", type=int, default=6, help="length to zero-pad numbers to (default: 6)")
+    parser.add_argument("-s", "--start", type=int, default=1, help="number of the first page (default: 1)")
+    parser.add_argument("-a", "--area", choices=AREAS, default="bottom-right",
+                        help="where to place the number (default: bottom-right)")
+    parser.add_argument("-o", "--output", default="", help="directory to save to (default: current directory)")
+    parser.add_argument("-w", "--workers", type=int, help="number of workers (default: depends on the executor)")
+    parser.add_argument("-e", "--executor", choices=("thread", "process"), default="thread",
+                        help="save in threads or worker processes (default: thread)")
+    parser.add_argument("--overwrite", action="store_true", help="overwrite existing output files")
+    parser.add_argument("-m", "--manifest", help="JSON lines file of jobs to run, one object per line with the "
+                                                 "options above as keys; the command line gives the defaults")
+    parser.add_argument("--version", action="version", version="%(prog)s " + __version__)
+    args = parser.parse_args(argv)
+
+    defaults = {"inputs": args.inputs, "prefix": args.prefix, "fill": args.fill, "start": args.start,
+                "area": args.area, "output": args.output, "workers": args.workers, "executor": args.executor,
+                "overwrite": args.overwrite}
+    if args.manifest is None:
+        jobs = [defaults]
+    else:
+        try:
+            jobs = read_manifest(args.manifest, defaults)
+        except (OSError, ValueError) as e:
+            parser.error("can not read manifest {}: {}".format(args.manifest, e))
+
+    for num, job in enumerate(jobs, 1):
+        if not job["inputs"] or job["prefix"] is None:
+            parser.error("job {} needs inputs and a prefix".format(num))
+        if job["area"] not in AREAS:
+            parser.error("job {} has unknown area {}".format(num, job["area"]))
+
+    failed = 0
+    for job in jobs:
+        failed += run(**job)
+    return 1 if failed else 0
+
+
+def read_manifest(path, defaults=None):
+    """
+    Read the jobs of a manifest: a JSON lines file with an object for each job.  Keys are the long options of the
+    command line, "inputs" is a path, pattern or list of them, and blank lines and lines starting with # are skipped.
+
+    Args:
+        path (str): Path of the manifest.
+        defaults (dict): Options for keys a job leaves out.
+
+    Returns:
+        list: The options of each job.
+
+    Raises:
+        ValueError: When a line is not a JSON object or has an unknown key.
+    """
+    jobs = []
+    with open(path, encoding="utf-8") as in_file:
+        for num, line in enumerate(in_file, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            entry = json.loads(line)
+            if not isinstance(entry, dict):
+                raise ValueError("line {} is not a JSON object".format(num))
+            job = dict(defaults or {})
+            for key, value in entry.items():
+                if defaults is not None and key not in defaults:
+                    raise ValueError("line {} has unknown key {}".format(num, key))
+                job[key] = value
+            if isinstance(job.get("inputs"), str):
+                job["inputs"] = [job["inputs"]]
+            jobs.append(job)
+    return jobs
+
+
+def expand(inputs):
+    """
+    List the PDF files named by command line inputs.
+
+    Args:
+        inputs (list): PDF files, directories of PDF files or glob patterns.
+
+    Returns:
+        list: Paths of the files, in the order of the inputs and sorted by name within each.
+    """
+    paths = []
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            paths.extend(sorted(os.path.join(pattern, name) for name in os.listdir(pattern)
+                                if name.lower().endswith(".pdf")))
+        elif glob.has_magic(pattern):
+            paths.extend(sorted(glob.glob(pattern, recursive=True)))
+        else:
+            paths.append(pattern)
+    return paths
+
+
+def run(inputs, prefix, fill=6, start=1, area="bottom-right", output="", workers=None, executor="thread",
+        overwrite=False, out=None, err=None):
+    """
+    Number and save the PDFs of one job, reporting the outcome.
+
+    Args:
+        inputs (list): PDF files, directories of PDF files or glob patterns.
+        prefix (str): Bates number prefix.
+        fill (int): Length to zero-pad numbers to.
+        start (int): Number of the first page.
+        area (str): One of AREAS.
+        output (str): Directory to save to.
+        workers (int): Number of workers.
+        executor (str): "thread" or "process".
+        overwrite (bool): Overwrite existing output files.
+        out (file): Where to write the summary.  Defaults to sys.stdout.
+        err (file): Where to write failures.  Defaults to sys.stderr.
+
+    Returns:
+        int: Number of files that could not be read or saved.
+    """
+    from .marisol import Area, Marisol
+    from .sinks import DirectorySink
+
+    out = out or sys.stdout
+    err = err or sys.stderr
+    if output:
+        os.makedirs(output, exist_ok=True)
+
+    m = Marisol(prefix, fill, start, Area[area.upper().replace("-", "_")], lazy=True)
+    failures = m.extend(expand(inputs), workers=workers, executor=executor)
+    results = m.save(overwrite=overwrite, workers=workers, executor=executor, sink=DirectorySink(output))
+
+    for path, error in failures:
+        err.write("{}: {}\n".format(path, error))
+    saved = 0
+    for document, (filename, success) in zip(m.documents, results):
+        if success:
+            saved += 1
+        elif filename == "EXISTS":
+            err.write("{}.pdf already exists\n".format(document.begin))
+        else:
+            err.write("{}.pdf: {}\n".format(document.begin, filename))
+    numbers = "{} - {}".format(m[0].begin, m[-1].end) if m.documents else m.prefix
+    out.write("{}: {} of {} documents saved to {}\n".format(numbers, saved, len(results) + len(failures),
+                                                            output or "."))
+    return len(failures) + len(results) - saved
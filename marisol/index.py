@@ -0,0 +1,121 @@
+from array import array
+
+import bisect
+
+
+class BatesIndex(object):
+
+    def __init__(self, prefix, fill):
+        """
+        Bates numbers of the documents of a collection, kept as two arrays of integers: the number of the first page
+        of each document and its page count, in bates order.  Finding the document holding a number bisects the
+        start numbers, without touching the documents or formatting any numbers.
+
+        Args:
+            prefix (str): Bates number prefix.
+            fill (int): Length the numbers are zero-padded to.
+        """
+        self.prefix = prefix
+        self.fill = fill
+        self.starts = array("q")
+        self.lengths = array("q")
+
+    def __len__(self):
+        return len(self.starts)
+
+    def add(self, start, pages):
+        """
+        Add the next document.
+
+        Args:
+            start (int): Number of its first page.
+            pages (int): Number of pages in it.
+
+        Raises:
+            ValueError: When the document starts before the end of the previous one.
+        """
+        if self.starts and start < self.starts[-1] + self.lengths[-1]:
+            raise ValueError("Document starting at {} overlaps the document before it.".format(self.format(start)))
+        self.starts.append(start)
+        self.lengths.append(pages)
+
+    def format(self, num):
+        """
+        Returns:
+            str: The bates number for a page number.
+        """
+        return _format(self.prefix, self.fill, num)
+
+    def parse(self, number):
+        """
+        Page number of a bates number.
+
+        Args:
+            number (str): Bates number, such as "TEST004512".
+
+        Returns:
+            int: The page number, 4512.
+
+        Raises:
+            KeyError: When the number does not have the prefix of the index or is not followed by digits.
+        """
+        number = str(number)
+        digits = number[len(self.prefix):]
+        if not number.startswith(self.prefix) or not digits.isdigit():
+            raise KeyError("No page numbered {}".format(number))
+        return int(digits)
+
+    def locate(self, number):
+        """
+        Find the page with a bates number.
+
+        Args:
+            number (str): Bates number, such as "TEST004512".
+
+        Returns:
+            (int, int): Index of the document holding the page, and index of the page within the document.
+
+        Raises:
+            KeyError: When no document has a page with the number.
+        """
+        num = self.parse(number)
+        index = bisect.bisect_right(self.starts, num) - 1
+        if index < 0 or num >= self.starts[index] + self.lengths[index]:
+            raise KeyError("No page numbered {}".format(number))
+        return index, num - self.starts[index]
+
+    def spans(self, begin, end):
+        """
+        Find the pages numbered from `begin` to `end`, inclusive.  Numbers in the range that no document has, such as
+        those of documents in another shard, are skipped.
+
+        Args:
+            begin (str): First bates number of the range.
+            end (str): Last bates number of the range.
+
+        Returns:
+            list: (document index, index of the first page, index after the last page) of each document with pages in
+                the range, in bates order.
+
+        Raises:
+            KeyError: When either number does not have the prefix of the index.
+        """
+        first = self.parse(begin)
+        last = self.parse(end)
+        spans = []
+        index = max(bisect.bisect_right(self.starts, first) - 1, 0)
+        while index < len(self.starts) and self.starts[index] <= last:
+            start = self.starts[index]
+            low = max(first, start) - start
+            high = min(last + 1, start + self.lengths[index]) - start
+            if low < high:
+                spans.append((index, low, high))
+            index += 1
+        return spans
+
+
+def _format(prefix, fill, num):
+    """
+    Bates number of a page number, such as "TEST004512" for 4512.
+    """
+    return "{prefix}{num}".format(prefix=prefix, num=str(num).zfill(fill))
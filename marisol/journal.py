@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import threading
+
+
+class Journal(object):
+
+    def __init__(self, path):
+        """
+        Record of the documents of a production that have been saved completely, kept in a JSON lines file.  Each line
+        holds the bates range, output file name, size and SHA-256 checksum of one document and is written in a single
+        call and synced to disk, so a crash loses at most the line being written.
+
+        Args:
+            path (str): Path of the journal file.  Entries already in it are loaded.
+        """
+        self.path = path
+        self.entries = {}
+        self.file = None
+        self.lock = threading.Lock()
+
+        self._separate = False
+        if os.path.exists(path):
+            with open(path, "rb") as in_file:
+                data = in_file.read()
+            for line in data.splitlines():
+                try:
+                    entry = json.loads(line.decode("utf-8"))
+                except ValueError:
+                    continue  # line cut short by a crash
+                self.entries[entry["begin"]] = entry
+            self._separate = bool(data) and not data.endswith(b"\n")
+
+    def __contains__(self, begin):
+        return begin in self.entries
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __getitem__(self, begin):
+        return self.entries[begin]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def close(self):
+        """
+        Close the journal file.
+        """
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    def complete(self, begin, end, filename):
+        """
+        Check that a document has been saved completely: it is in the journal with the same bates range and file name,
+        and the file still has the recorded size and checksum.
+
+        Args:
+            begin (str): Beginning bates number of the document.
+            end (str): Ending bates number of the document.
+            filename (str): Path the document is saved to.
+
+        Returns:
+            bool
+        """
+        entry = self.entries.get(begin)
+        if entry is None or entry["end"] != end or entry["filename"] != filename:
+            return False
+        try:
+            if os.path.getsize(filename) != entry["size"]:
+                return False
+        except OSError:
+            return False
+        return _digest(filename) == entry["sha256"]
+
+    def record(self, begin, end, filename, checksum=None):
+        """
+        Add a saved document to the journal.
+
+        Args:
+            begin (str): Beginning bates number of the document.
+            end (str): Ending bates number of the document.
+            filename (str): Path the document was saved to.
+            checksum (tuple): Size and SHA-256 checksum of the file, when computed while writing it (see
+                `DirectorySink.checksum`).  Otherwise the file is read back to compute them.
+
+        Returns:
+            dict: The journal entry.
+        """
+        size, sha256 = checksum or (os.path.getsize(filename), _digest(filename))
+        entry = {"begin": begin, "end": end, "filename": filename, "size": size, "sha256": sha256}
+        line = json.dumps(entry, sort_keys=True) + "\n"
+
+        with self.lock:
+            if self.file is None:
+                self.file = open(self.path, "a", encoding="utf-8")
+            if self._separate:
+                line = "\n" + line  # keep clear of a line cut short by a crash
+                self._separate = False
+            self.file.write(line)
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.entries[begin] = entry
+        return entry
+
+
+def _digest(filename):
+    """
+    SHA-256 checksum of a file, as a hex string.
+    """
+    digest = hashlib.sha256()
+    with open(filename, "rb") as in_file:
+        for block in iter(lambda: in_file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
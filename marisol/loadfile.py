@@ -0,0 +1,96 @@
+import threading
+
+# Concordance field delimiter and quote
+DAT_DELIMITER = "\x14"
+DAT_QUOTE = "\xfe"
+DAT_FIELDS = ("BEGBATES", "ENDBATES", "PAGECOUNT", "FILEPATH")
+
+
+class LoadFile(object):
+
+    def __init__(self, dat=None, opt=None, volume="VOL001", directory=""):
+        """
+        Concordance DAT and Opticon OPT load files for a production, written while it is saved.  Documents finish in
+        any order, so each one is recorded with its position in the collection and its rows are held back until every
+        document before it has been recorded.  Everything is taken from the documents in memory, the saved files are
+        never read back.
+
+        Args:
+            dat (str): Path of the DAT file: one row per document with its bates range, page count and file path.
+            opt (str): Path of the OPT file: one row per page, pointing at the file holding the page.
+            volume (str): Volume name written in the OPT file.
+            directory (str): Prefix for the file paths in the load files, such as "NATIVES\\".
+        """
+        self.volume = volume
+        self.directory = directory
+        self.dat = None if dat is None else open(dat, "w", encoding="utf-8-sig", newline="")
+        self.opt = None if opt is None else open(opt, "w", encoding="utf-8", newline="")
+        self.next = 0
+        self.pending = {}  # index to (document, filename) of documents recorded ahead of their turn
+        self.lock = threading.Lock()
+
+        if self.dat is not None:
+            self.dat.write(_dat_row(DAT_FIELDS))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        Write the rows still held back, for documents recorded after one that never was, and close the files.
+        """
+        with self.lock:
+            for index in sorted(self.pending):
+                self._write(*self.pending.pop(index))
+            for out_file in (self.dat, self.opt):
+                if out_file is not None:
+                    out_file.close()
+            self.dat = self.opt = None
+
+    def flush(self):
+        """
+        Flush the rows written so far to disk.
+        """
+        with self.lock:
+            for out_file in (self.dat, self.opt):
+                if out_file is not None:
+                    out_file.flush()
+
+    def record(self, index, document, filename=None):
+        """
+        Add a document, writing its rows and those of any documents after it that were waiting for it.
+
+        Args:
+            index (int): Position of the document in the collection, from 0.
+            document (marisol.Document): The document.
+            filename (str): Path the document was saved to, or None when it was not saved.  Unsaved documents get
+                no rows, but no longer hold back the documents after them.
+        """
+        with self.lock:
+            self.pending[index] = (document, filename)
+            while self.next in self.pending:
+                self._write(*self.pending.pop(self.next))
+                self.next += 1
+
+    def _write(self, document, filename):
+        if filename is None:
+            return
+        path = self.directory + filename
+        if self.dat is not None:
+            self.dat.write(_dat_row((document.begin, document.end, str(len(document)), path)))
+        if self.opt is not None:
+            for num in range(len(document)):
+                number = str(document.start + num).zfill(document.fill)
+                first = num == 0
+                self.opt.write("{}{},{},{},{},,,{}\r\n".format(document.prefix, number, self.volume, path,
+                                                                "Y" if first else "", len(document) if first else ""))
+
+
+def _dat_row(fields):
+    """
+    One line of a DAT file.
+    """
+    return DAT_DELIMITER.join(DAT_QUOTE + field + DAT_QUOTE for field in fields) + "\r\n"
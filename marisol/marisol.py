@@ -1,13 +1,32 @@
 from concurrent import futures
 from enum import Enum
-from PyPDF2 import PdfFileReader, PdfFileWriter
+from PyPDF2 import PdfFileReader
+from reportlab.pdfbase.pdfmetrics import stringWidth
 from reportlab.pdfgen import canvas
 from reportlab.lib import pagesizes
 
+from .backends import _FONT_NAME, get_backend
+from .index import BatesIndex, _format
+from .journal import Journal
+from .plan import Plan
+from .redactions import outside_boundaries, read_redactions
+from .sinks import DirectorySink, MemorySink
+from .stats import DocumentStats, SaveStats
+
+import asyncio
+import contextlib
 import copy
+import functools
 import io
+import itertools
+import mmap
 import os
 import multiprocessing
+import time
+
+
+# Most drawing operators kept for each of the static overlay and redaction caches, see `stamp_cache_info`.
+STAMP_CACHE_SIZE = 1024
 
 
 class Area(Enum):
@@ -29,7 +48,7 @@ class RedactionStyle(Enum):
 
 class Marisol(object):
 
-    def __init__(self, prefix, fill, start, area=Area.BOTTOM_RIGHT):
+    def __init__(self, prefix, fill, start, area=Area.BOTTOM_RIGHT, lazy=False, cache=None, backend=None):
         """
         Marisol Base Class - A collection of documents to be bates numbered.
 
@@ -38,17 +57,27 @@ class Marisol(object):
             fill (int): Length for zero-filling
             start (int): Starting bates number
             area (Area): Area in which to place the bates number.
+            lazy (bool): Only count pages when appending documents, and parse each document when it is saved.  Keeps
+                memory use proportional to the number of workers instead of the size of the collection.
+            cache (marisol.DocumentCache): Share the parsed PDF and page contents between documents with the same
+                content.
+            backend (str or marisol.Backend): PDF library to read, stamp and write the documents with, "pypdf2" (the
+                default) or "pypdf".
         """
         self.prefix = prefix
         self.fill = fill
         self.start = start
         self.area = area
+        self.lazy = lazy
+        self.cache = cache
+        self.backend = get_backend(backend)
 
         self.index = 0
         self.number = 0
 
         self.documents = []
-        self.overwrite = False
+        self.bates = BatesIndex(prefix, fill)  # numbers of `documents`, kept up to date by the methods adding them
+        self.options = {"overwrite": False}
 
     def __getitem__(self, key):
         return self.documents[key]
@@ -65,22 +94,115 @@ class Marisol(object):
         self.index += 1
         return self.documents[self.index-1]
 
-    def _save_document(self, document):
+    def _save_document(self, document, submitted=None):
         """
         Internal method called by thread pool executor.
 
         Args:
             document (Document):  The document to save.
+            submitted (float): When collecting stats, the time.time() the document was submitted to the executor.
 
         Returns:
-            (str, bool): The file name saved to and success or failure.
+            (str, bool): The file name saved to and success or failure, plus the DocumentStats when collecting stats.
         """
-        try:
-            filename = document.save(overwrite=self.overwrite)
-        except FileExistsError:
-            return "EXISTS", False
-        else:
-            return filename, True
+        return _save_document(document, self.options, submitted)
+
+    def add_redactions(self, rows):
+        """
+        Add many redactions at once, each to the page with its bates number.  Pages are found with `locate`, and all
+        boxes are checked against their pages in one pass.  Nothing is added unless every row is valid.
+
+        Args:
+            rows (iterable): A dict for each redaction with "bates", "x", "y", "width" and "height", and optionally
+                "text" and "style" (the name of a RedactionStyle), as read by `load_redactions`.
+
+        Returns:
+            int: Number of redactions added.
+
+        Raises:
+            RedactionImportError: Listing every row that could not be added, with the error for it.
+        """
+        errors = []
+        pages = []
+        redactions = []
+        for num, row in enumerate(rows, 1):
+            try:
+                page = self.locate(row["bates"])
+                style = RedactionStyle[(row.get("style") or RedactionStyle.SOLID.name).upper()]
+                redaction = Redaction((float(row["x"]), float(row["y"])), (float(row["width"]), float(row["height"])),
+                                      row.get("text") or None, style)
+            except (AttributeError, KeyError, TypeError, ValueError) as e:
+                errors.append((num, e))
+                continue
+            pages.append(page)
+            redactions.append((num, redaction))
+
+        outside = outside_boundaries([redaction.position + redaction.size for num, redaction in redactions],
+                                     [(page.width, page.height) for page in pages])
+        for index in outside:
+            num, redaction = redactions[index]
+            page = pages[index]
+            errors.append((num, OutsideBoundariesError("Redaction with position {} and size {} is outside of page {} "
+                                                       "({},{})".format(redaction.position, redaction.size, page,
+                                                                        page.width, page.height))))
+        if errors:
+            raise RedactionImportError(sorted(errors, key=lambda error: error[0]))
+
+        for page, (num, redaction) in zip(pages, redactions):
+            page.redactions.append(redaction)
+        return len(redactions)
+
+    def locate(self, number):
+        """
+        Find the page with a bates number, by bisecting the start numbers of the documents (see `bates`).
+
+        Args:
+            number (str): Bates number, such as "TEST004512".
+
+        Returns:
+            Page: The page, whose document is `page.document`.  Lazy documents are loaded to get it.
+
+        Raises:
+            KeyError: When no page has the bates number.
+        """
+        index, num = self.bates.locate(number)
+        return self.documents[index][num]
+
+    def locate_range(self, begin, end):
+        """
+        Find the pages numbered from `begin` to `end`, inclusive, such as the pages to stamp again after a correction.
+
+        Args:
+            begin (str): First bates number of the range.
+            end (str): Last bates number of the range.
+
+        Returns:
+            list: The pages in bates order.  Lazy documents with pages in the range are loaded to get them.
+
+        Raises:
+            KeyError: When either number does not have the prefix of the collection.
+        """
+        pages = []
+        for index, first, stop in self.bates.spans(begin, end):
+            pages.extend(self.documents[index][first:stop])
+        return pages
+
+    def load_redactions(self, file, format=None):
+        """
+        Add the redactions in a CSV or JSON file, see `add_redactions` and `marisol.redactions.read_redactions`.
+
+        Args:
+            file (str or file-like object): Path or open text file to read.
+            format (str): "csv" or "json".  Taken from the extension when reading from a path.
+
+        Returns:
+            int: Number of redactions added.
+
+        Raises:
+            RedactionImportError: Listing every row that could not be added, with the error for it.
+            ValueError: When the format is not "csv" or "json".
+        """
+        return self.add_redactions(read_redactions(file, format))
 
     def append(self, file):
         """
@@ -92,31 +214,379 @@ class Marisol(object):
         Returns:
             marisol.Marisol: The current Marisol instance.
         """
-        d = Document(file, self.prefix, self.fill, self.start+self.number, self.area)
+        d = Document(file, self.prefix, self.fill, self.start+self.number, self.area, self.lazy, cache=self.cache,
+                     backend=self.backend)
+        self.bates.add(d.start, len(d))
         self.number += len(d)
         self.documents.append(d)
         return self
 
-    def save(self, overwrite=False, threads=multiprocessing.cpu_count()*6):
-        """Save all documents using a thread pool executor
+    def extend(self, paths, workers=None, executor="thread"):
+        """
+        Add many documents to the collection, counting their pages in parallel.  Bates numbers are assigned in input
+        order, exactly as appending the files one at a time would.  Files that can not be read are skipped and
+        reported instead of stopping the whole batch.
+
+        The documents are added lazily, whatever the collection's `lazy` setting: counting is all the numbering
+        needs, and each PDF is parsed when its pages are first used or it is saved, so the files have to stay in
+        place until then.  Parsing them here would take several times as long as counting, one file at a time.
+
+        Args:
+            paths (iterable): File names of the PDFs to add.
+            workers (int, optional): The number of workers counting pages.  Defaults to the number of cores.
+            executor (str, optional): "thread" or "process", see `save`.
+
+        Returns:
+            list: file name and exception for each file that could not be read.
+
+        Raises:
+            ValueError: When the executor is not "thread" or "process".
+        """
+        paths = list(paths)
+        failures = []
+        for path, count in zip(paths, _count_files(paths, workers, executor)):
+            if isinstance(count, Exception):
+                failures.append((path, count))
+                continue
+            try:
+                d = Document(path, self.prefix, self.fill, self.start+self.number, self.area, lazy=True, length=count,
+                             cache=self.cache, backend=self.backend)
+            except Exception as e:
+                failures.append((path, e))
+                continue
+            self.bates.add(d.start, len(d))
+            self.number += len(d)
+            self.documents.append(d)
+        return failures
+
+    def plan(self, paths, workers=None, executor="thread"):
+        """
+        Count the pages of many files in parallel and assign their bates numbers in input order, continuing from the
+        documents already in the collection, without adding them.  The plan can be saved and split between machines
+        with `from_plan`.  Files that can not be read are left out and listed in the plan's `failures`.
+
+        Args:
+            paths (iterable): File names of the PDFs to plan.
+            workers (int, optional): The number of workers counting pages.  Defaults to the number of cores.
+            executor (str, optional): "thread" or "process", see `save`.
+
+        Returns:
+            marisol.Plan: The numbering plan.
+
+        Raises:
+            ValueError: When the executor is not "thread" or "process".
+        """
+        paths = list(paths)
+        plan = Plan(self.prefix, self.fill, self.start+self.number)
+        for path, count in zip(paths, _count_files(paths, workers, executor)):
+            if isinstance(count, Exception):
+                plan.failures.append((path, count))
+            else:
+                plan.add(path, count)
+        return plan
+
+    @classmethod
+    def from_plan(cls, plan, shard=0, shards=1, area=Area.BOTTOM_RIGHT, lazy=False, cache=None, backend=None):
+        """
+        Build the collection of one shard of a numbering plan.  Each document keeps the bates numbers assigned by the
+        plan, so saving every shard on its own machine writes exactly the files saving the whole plan would.
+        Documents appended afterwards are numbered after the end of the whole plan.
+
+        Args:
+            plan (marisol.Plan or str): The plan, or the path of a plan file.
+            shard (int): Index of the shard to build, from 0.
+            shards (int): Number of shards the plan is split into.
+            area (Area): Area in which to place the bates number.
+            lazy (bool): See `Marisol`.  The page counts come from the plan, so the files are not opened until saved.
+            cache (marisol.DocumentCache): See `Marisol`.
+            backend (str or marisol.Backend): See `Marisol`.
+
+        Returns:
+            marisol.Marisol: The collection of the shard.
+
+        Raises:
+            ValueError: When the shard does not exist, or a file no longer has the number of pages in the plan.
+        """
+        if not isinstance(plan, Plan):
+            plan = Plan.load(plan)
+        m = cls(plan.prefix, plan.fill, plan.start, area, lazy, cache, backend)
+        for entry in plan.shard(shard, shards):
+            d = Document(entry["file"], m.prefix, m.fill, entry["start"], m.area, m.lazy, length=entry["pages"],
+                         cache=m.cache, backend=m.backend)
+            if len(d) != entry["pages"]:
+                raise ValueError("{} has {} pages, the plan numbers {}.".format(entry["file"], len(d), entry["pages"]))
+            m.bates.add(d.start, len(d))
+            m.documents.append(d)
+        m.number = plan.pages
+        return m
+
+    def save(self, overwrite=False, threads=None, executor="thread", workers=None, append_only=False, incremental=False,
+             stats=False, callback=None, journal=None, resume=False, split=None, compress=None, object_streams=False,
+             load_file=None, sink=None, forms=False):
+        """Save all documents using a thread or process pool executor.  The largest documents are started first, so that
+        no large document is left running on its own at the end.
 
         Args:
             overwrite (bool, optional): Switch to allow overwriting of existing files.
             threads (int, optional): The number of threads to use when processing.  Defaults to the number of cores
                 times six.
+            executor (str, optional): "thread" to save in a thread pool, or "process" to save in a pool of worker
+                processes.  Stamping is CPU-bound and holds the GIL, so only the process pool scales across cores.
+            workers (int, optional): The number of workers to use.  Defaults to `threads` for the thread pool and the
+                number of cores for the process pool.
+            append_only (bool, optional): Stamp pages by appending a content stream instead of merging (see
+                Document.save).
+            incremental (bool, optional): Write each PDF as its original bytes plus an incremental update (see
+                Document.save).
+            stats (bool, optional): Collect timings and counters for each document and page, and return them along
+                with the results.
+            callback (function, optional): Called with the DocumentStats of each document as soon as it is saved.
+                Collects stats even when `stats` is not set.
+            journal (str or marisol.Journal, optional): Record each document in this journal as soon as it is saved.
+            resume (bool, optional): Skip the documents the journal shows as completely saved, and save the others
+                again, overwriting what a previous run left of them.
+            split (int, optional): With the process pool, stamp documents with more pages than this in ranges of this
+                many pages, which are worked on by different workers and then assembled into the document's file.
+                Numbering and page order are the same as saving the document whole.  Not used with `incremental`, and
+                ignored by the thread pool, where stamping holds the GIL and the ranges would only add the cost of
+                assembling them.
+            compress (int, optional): zlib level to compress the new content streams at (see Document.save).
+            object_streams (bool, optional): Pack objects into object streams (see Document.save).
+            load_file (marisol.LoadFile, optional): Write the load file rows of each document as soon as it is saved,
+                in bates order.  Documents skipped by `resume` are written too, so use a new LoadFile for each save.
+            sink (marisol.Sink, optional): Where to save the documents, such as a MemorySink or a ZipSink fed by
+                all the workers.  Defaults to files in the current directory.  With the process pool, documents are
+                stamped in the workers and written to the sink by this process.
+            forms (bool, optional): Draw static overlays and redactions shared by many pages once per file (see
+                Document.save).
 
         Returns:
-            list: each file name and true or false indicating success or failure
+            list: each file name and true or false indicating success or failure.  A document that could not be saved
+                has "EXISTS" when its file already exists, or the error raised reading or writing it, in place of
+                the file name.  With `stats`, a tuple of that list and the SaveStats for the whole collection.
+
+        Raises:
+            ValueError: When the executor is not "thread" or "process", when resuming without a journal, or when
+                keeping a journal of documents not saved to a directory.
+        """
+        if resume and journal is None:
+            raise ValueError("A journal is required to resume.")
+        sink = DirectorySink() if sink is None else sink
+        if journal is not None and not isinstance(sink, DirectorySink):
+            raise ValueError("A journal can only be kept of documents saved to a directory.")
+        self.options = {"overwrite": overwrite or resume, "append_only": append_only, "incremental": incremental,
+                        "compress": compress, "object_streams": object_streams, "sink": sink, "forms": forms}
+        # sinks other than directories can not be sent to worker processes, so the PDFs are sent back instead
+        deferred = executor == "process" and not isinstance(sink, DirectorySink)
+        options = dict(self.options, sink=None) if deferred else self.options
+        collect = stats or callback is not None or journal is not None  # the stats carry the checksums back
+        started = time.perf_counter()
+
+        owned = isinstance(journal, str)
+        if owned:
+            journal = Journal(journal)
+
+        results = [None] * len(self.documents)
+        remaining = []
+        for index, document in enumerate(self.documents):
+            filename = "{begin}.pdf".format(begin=document.begin)
+            if resume and journal.complete(document.begin, document.end, sink.path(filename)):
+                results[index] = (filename, True)
+                if load_file is not None:
+                    load_file.record(index, document, filename)
+            elif deferred and not overwrite and sink.exists(filename):
+                results[index] = ("EXISTS", False)
+                if load_file is not None:
+                    load_file.record(index, document)
+            else:
+                remaining.append(index)
+
+        # units of work as (pages, document index, first page or None for the whole document), largest first
+        tasks = []
+        for index in remaining:
+            length = len(self.documents[index])
+            if split and executor == "process" and length > split and not incremental:
+                tasks.extend((min(split, length - start), index, start) for start in range(0, length, split))
+            else:
+                tasks.append((length, index, None))
+        tasks.sort(key=lambda task: -task[0])
+
+        save_stats = SaveStats()
+        try:
+            workers = workers or threads
+            if executor == "thread" and workers is None:
+                workers = multiprocessing.cpu_count()*6
+            with _executor(executor, workers) as pool:
+                jobs = {}
+                parts = {}
+                for pages, index, start in tasks:
+                    document = self.documents[index]
+                    submitted = time.time() if collect else None  # wall clock, comparable across worker processes
+                    if start is not None:
+                        job = pool.submit(_stamp_range, document, start, start + split, options, submitted)
+                        parts.setdefault(index, {})
+                    elif executor == "thread":
+                        job = pool.submit(self._save_document, document, submitted)
+                    elif deferred:
+                        job = pool.submit(_in_memory, _save_document, document, options=options, submitted=submitted)
+                    else:
+                        # documents are pickled down to their PDF bytes, bates start and user additions (see
+                        # Document.__getstate__)
+                        job = pool.submit(_save_document, document, options, submitted)
+                    jobs[job] = (index, start)
+
+                while jobs:
+                    done, _ = futures.wait(jobs, return_when=futures.FIRST_COMPLETED)
+                    for job in done:
+                        index, start = jobs.pop(job)
+                        result = job.result()
+                        if start is not None:
+                            parts[index][start] = result
+                            if len(parts[index]) * split >= len(self.documents[index]):
+                                job = _assemble(pool, self.documents[index], parts.pop(index), options, deferred)
+                                jobs[job] = (index, None)
+                            continue
+
+                        if deferred:
+                            result = _deliver(sink, result)
+                        results[index] = result[:2]
+                        document = self.documents[index]
+                        if journal is not None and result[1]:
+                            journal.record(document.begin, document.end, sink.path(result[0]), result[2].checksum)
+                        if load_file is not None:
+                            load_file.record(index, document, result[0] if result[1] else None)
+                        if collect:
+                            save_stats.add(result[2])
+                            if callback is not None:
+                                callback(result[2])
+        finally:
+            if owned:
+                journal.close()
+            if load_file is not None:
+                load_file.flush()
+        save_stats.seconds = time.perf_counter() - started
+
+        if stats:
+            return results, save_stats
+        return results
+
+    def stream(self, files, overwrite=False, workers=None, executor="thread", append_only=False, incremental=False,
+               compress=None, object_streams=False, forms=False):
+        """
+        Number and save documents as they are read from an iterable, keeping only a bounded number in memory.  Bates
+        numbers are assigned in input order, continuing from the documents already in the collection, but the
+        documents are not added to it.
+
+        Args:
+            files (iterable): PDF files or file names to number.
+            overwrite (bool, optional): Switch to allow overwriting of existing files.
+            workers (int, optional): The number of workers, which is also the most documents held in memory at once.
+                Defaults to the number of cores.
+            executor (str, optional): "thread" or "process", see `save`.
+            append_only (bool, optional): See Document.save.
+            incremental (bool, optional): See Document.save.
+            compress (int, optional): See Document.save.
+            object_streams (bool, optional): See Document.save.
+            forms (bool, optional): See Document.save.
+
+        Yields:
+            tuple: input file, file name saved to, beginning bates number, ending bates number and success or failure,
+                in the order the documents finish.  A file that could not be read yields the error raised reading it
+                in place of the file name, with no bates numbers, and the numbers are not used up.
+
+        Raises:
+            ValueError: When the executor is not "thread" or "process".
+        """
+        options = {"overwrite": overwrite, "append_only": append_only, "incremental": incremental,
+                   "compress": compress, "object_streams": object_streams, "forms": forms}
+        workers = workers or multiprocessing.cpu_count()
+        pool = _executor(executor, workers)
+        pending = {}
+
+        def finished(future):
+            file, begin, end = pending.pop(future)
+            filename, success = future.result()
+            return file, filename, begin, end, success
+
+        with pool:
+            for file in files:
+                try:
+                    document = Document(file, self.prefix, self.fill, self.start+self.number, self.area, lazy=True,
+                                        cache=self.cache, backend=self.backend)
+                except Exception as e:
+                    yield file, e, None, None, False
+                    continue
+                self.number += len(document)
+                pending[pool.submit(_save_document, document, options)] = (file, document.begin, document.end)
+                del document  # only the worker holds on to it
+
+                if len(pending) >= workers:
+                    done, _ = futures.wait(pending, return_when=futures.FIRST_COMPLETED)
+                    for future in done:
+                        yield finished(future)
+
+            for future in futures.as_completed(list(pending)):
+                yield finished(future)
+
+    async def save_async(self, overwrite=False, executor=None, workers=None, limit=None, append_only=False,
+                         incremental=False, compress=None, object_streams=False, forms=False):
+        """
+        Save all documents without blocking the event loop.  The documents are stamped on an executor and the results
+        are yielded in the order the documents finish, so a short document is not held up by a long one ahead of it.
+
+        At most `limit` documents are handed to the executor at a time, which keeps a large collection from queueing
+        ahead of other work sharing the same executor.  Closing the iterator early, or cancelling the task iterating
+        over it, cancels the documents that have not started yet.
+
+        Args:
+            overwrite (bool, optional): Switch to allow overwriting of existing files.
+            executor (optional): "thread" or "process" for a pool of `workers` created for this call, or a
+                concurrent.futures.Executor to share.  Defaults to the event loop's default executor.
+            workers (int, optional): Number of workers of a pool created for this call.
+            limit (int, optional): Most documents submitted to the executor at once.  Defaults to `workers`, or the
+                number of cores.
+            append_only (bool, optional): See Document.save.
+            incremental (bool, optional): See Document.save.
+            compress (int, optional): See Document.save.
+            object_streams (bool, optional): See Document.save.
+            forms (bool, optional): See Document.save.
+
+        Yields:
+            tuple: the document, the file name saved to and success or failure, in the order the documents finish.
+
+        Raises:
+            ValueError: When the executor is not "thread" or "process".
         """
-        self.overwrite = overwrite
-        with futures.ThreadPoolExecutor(threads) as executor:
-            results = executor.map(self._save_document, self)
-        return list(results)
+        options = {"overwrite": overwrite, "append_only": append_only, "incremental": incremental,
+                   "compress": compress, "object_streams": object_streams, "forms": forms}
+        owned = isinstance(executor, str)
+        pool = _executor(executor, workers) if owned else executor
+        limit = limit or workers or multiprocessing.cpu_count()
+
+        loop = asyncio.get_event_loop()
+        documents = iter(self.documents)
+        pending = {}
+        try:
+            while True:
+                for document in itertools.islice(documents, limit - len(pending)):
+                    pending[loop.run_in_executor(pool, _save_document, document, options)] = document
+                if not pending:
+                    break
+
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    filename, success = future.result()
+                    yield pending.pop(future), filename, success
+        finally:
+            for future in pending:
+                future.cancel()  # only stops documents still waiting for a worker
+            if owned:
+                pool.shutdown(wait=False)
 
 
 class Document(object):
 
-    def __init__(self, file, prefix, fill, start, area):
+    def __init__(self, file, prefix, fill, start, area, lazy=False, length=None, cache=None, backend=None):
         """
         Represents a document to be numbered.
 
@@ -126,33 +596,57 @@ class Document(object):
             fill (int): Length to zero-pad number to.
             start (int): Number to start with.
             area (Area): Area on the document where the number should be drawn
+            lazy (bool): Only count the pages now.  The PDF is parsed and the pages are built when they are first
+                needed, and released again after saving.
+            length (int): Number of pages, when already known.  A lazy document loaded from a path then does not
+                need to open the file at all.  Loading the PDF raises ValueError if it turns out to have a different
+                number of pages, since the documents after it have been numbered from this one.
+            cache (marisol.DocumentCache): Share the parsed PDF and page contents with other documents with the
+                same content.  The cache is not sent to worker processes.
+            backend (str or marisol.Backend): PDF library to read, stamp and write the document with.  Defaults to
+                PyPDF2.
         """
-        try:
-            self.file = io.BytesIO(file.read())
-        except AttributeError:
-            with open(file, "rb") as file:
-                self.file = io.BytesIO(file.read())
-        self.reader = PdfFileReader(self.file)
         self.prefix = prefix
         self.fill = fill
         self.start = copy.copy(start)
         self.area = area
+        self.lazy = lazy
+        self.cache = cache
+        self.entry = None
+        self.backend = get_backend(backend)
 
         self.overlays = {x: None for x in Area}
         self.overlays[area] = BatesOverlay(None, self.area)
 
         self.index = 0
-
-        self.pages = []
-        for num, page in enumerate(self.reader.pages):
-            p = Page(self, page, self.prefix, self.fill, self.start + num)
-            self.pages.append(p)
+        self._begin = None
+        self._end = None
+
+        self.file = None
+        self.reader = None
+        self.pages = None
+        self.length = length
+
+        if lazy:
+            try:
+                self.source = file.read()
+            except AttributeError:
+                self.source = file  # keep only the path, the file is reopened when the pages are needed
+                if length is None:
+                    with open(file, "rb") as in_file:
+                        self.length = _count_pages(in_file)
+            else:
+                self.length = _count_pages(io.BytesIO(self.source))
+        else:
+            self.source = None
+            self._load(file)
 
     def __getitem__(self, k):
+        self._load()
         return self.pages[k]
 
     def __len__(self):
-        return self.reader.numPages
+        return self.length
 
     def __iter__(self):
         return self
@@ -160,12 +654,117 @@ class Document(object):
     def __next__(self):
         if self.index >= len(self):
             raise StopIteration
+        self._load()
         self.index += 1
         return self.pages[self.index-1]
 
     def __str__(self):
         return "{begin} - {end}".format(begin=self.begin, end=self.end)
 
+    def __getstate__(self):
+        """
+        Reduce the document to what a worker process needs to rebuild it: the PDF bytes (or path, for a lazy document),
+        the assigned bates start and any overlays and redactions added by the user.  The parsed reader and pages are not
+        pickled.
+        """
+        if self.pages is None:
+            redactions = None  # never loaded, so nothing can have been added
+        else:
+            redactions = [page.redactions for page in self.pages]
+        return {"source": self.source if self.lazy else bytes(_contents(self.file)),
+                "length": self.length,
+                "prefix": self.prefix,
+                "fill": self.fill,
+                "start": self.start,
+                "area": self.area,
+                "lazy": self.lazy,
+                "backend": self.backend,
+                "overlays": self.overlays,
+                "redactions": redactions}
+
+    def __setstate__(self, state):
+        self.prefix = state["prefix"]
+        self.fill = state["fill"]
+        self.start = state["start"]
+        self.area = state["area"]
+        self.lazy = state["lazy"]
+        self.backend = state["backend"]
+        self.overlays = state["overlays"]
+        self.index = 0
+        self._begin = None
+        self._end = None
+        self.cache = None
+        self.entry = None
+
+        self.source = state["source"] if self.lazy else None
+        self.length = state["length"]
+        self.file = None
+        self.reader = None
+        self.pages = None
+
+        if not self.lazy:
+            self._load(state["source"])
+        if state["redactions"] is not None:
+            self._load()
+            for page, redactions in zip(self.pages, state["redactions"]):
+                page.redactions = redactions
+
+    def _load(self, file=None):
+        """
+        Parse the PDF and build the pages, if that has not happened yet.
+
+        Args:
+            file (str, bytes or file-like object): PDF to load.  Defaults to the source kept by a lazy document.
+
+        Raises:
+            ValueError: When the PDF does not have the number of pages the document was numbered with, such as a file
+                changed after it was planned.
+        """
+        if self.pages is not None:
+            return
+        started = time.perf_counter()
+        file = self.source if file is None else file
+        self.file = _open_stream(file, mapped=self.lazy)
+        if self.cache is not None:
+            self.entry = self.cache.get(_contents(self.file), self.backend)
+
+        with self._lock():
+            self.reader = self.backend.read(self.file) if self.entry is None else self.entry.reader
+            pages = self.backend.pages(self.reader) if self.entry is None else self.entry.pages
+            if self.length is not None and len(pages) != self.length:
+                self._unload()
+                raise ValueError("Document {} has {} pages, but was numbered for {}.".format(self.begin, len(pages),
+                                                                                             self.length))
+            self.length = len(pages)
+
+            self.pages = []
+            for num, page in enumerate(pages):
+                p = Page(self, page, self.prefix, self.fill, self.start + num)
+                self.pages.append(p)
+        self.load_seconds = time.perf_counter() - started
+
+    def _unload(self):
+        """
+        Release the parsed PDF and pages of a lazy document.
+        """
+        if self.lazy:
+            if isinstance(self.file, mmap.mmap):
+                self.file.close()
+            self.file = None
+            self.reader = None
+            self.entry = None
+            self.pages = None
+            self.index = 0
+
+    def _lock(self):
+        """
+        Lock to hold while using a reader shared with other documents through the cache.
+
+        Returns:
+            context manager: The lock of the cache entry, or a context manager that does nothing.
+        """
+        return contextlib.nullcontext() if self.entry is None else self.entry.lock
+
     @property
     def begin(self):
         """
@@ -174,9 +773,9 @@ class Document(object):
         Returns:
             str: Bates number of the first page of the document.
         """
-        num = str(self.start)
-        num = num.zfill(self.fill)
-        return "{prefix}{num}".format(prefix=self.prefix, num=num)
+        if self._begin is None:
+            self._begin = _format(self.prefix, self.fill, self.start)
+        return self._begin
 
     @property
     def end(self):
@@ -186,36 +785,170 @@ class Document(object):
         Returns:
             str: Bates number of the last page of the document.
         """
-        num = str(self.start+len(self)-1)
-        num = num.zfill(self.fill)
-        return "{prefix}{num}".format(prefix=self.prefix, num=num)
+        if self._end is None:
+            self._end = _format(self.prefix, self.fill, self.start+len(self)-1)
+        return self._end
 
-    def save(self, filename=None, overwrite=False):
+    def save(self, filename=None, overwrite=False, append_only=False, incremental=False, stats=None, compress=None,
+             object_streams=False, sink=None, forms=False):
         """
         Applies the bates numbers and saves to file.
 
         Args:
-            filename (str): Path where the PDF should be saved.
+            filename (str or file-like object): Name the PDF should be saved under, or a seekable binary file to write
+                it to.
             overwrite (bool): Switch to allow overwriting of existing files.
+            append_only (bool): Add the stamp to each page as an extra content stream instead of merging it into the
+                page.  The original content streams are copied without being decoded, which is much faster for pages
+                with large content.
+            incremental (bool): Write the original file unchanged, followed by an incremental update containing only
+                the stamped pages and their new content streams.  Implies `append_only`.  Falls back to rewriting
+                the whole file for encrypted PDFs and for stamped pages that refer to objects of another file.
+            stats (marisol.DocumentStats): Record the timings and counters of this save into it.
+            compress (int): Flate-compress the content streams added by stamping at this zlib level, from 1 (fastest)
+                to 9 (smallest).  By default they are written uncompressed.
+            object_streams (bool): Pack the objects other than streams into compressed object streams, indexed by a
+                compressed cross-reference stream instead of a cross-reference table.  Not used with `incremental`.
+            sink (marisol.Sink): Where to save the PDF under `filename`.  Defaults to a file in the current directory.
+            forms (bool): Draw each static overlay and redaction once into a Form XObject that every page showing it
+                invokes, instead of into the content of each page, so that only the bates number is drawn page by
+                page.  Off by default because text extraction with PyPDF2 does not look inside Form XObjects.
 
         Returns:
-            str: Path where the file was saved.
+            str: Name the file was saved under, or the file object written to.
 
         Raises:
             FileExistsError: When the file already exists and overwrite is not enabled.
         """
-        filename = filename or "{begin}.pdf".format(begin=self.begin)
+        if hasattr(filename, "write"):
+            target = contextlib.nullcontext(filename)
+        else:
+            filename = filename or "{begin}.pdf".format(begin=self.begin)
+            sink = DirectorySink() if sink is None else sink
+            if sink.exists(filename) and not overwrite:
+                raise FileExistsError("PDF file {} already exists and overwrite is disabled.".format(filename))
+            target = sink.open(filename)
+
+        loaded = self.pages is not None
+        self._load()
+        if stats is not None:
+            stats.timings["load"] += self.load_seconds
+            stats.counters["bytes_read"] += _size(self.file)
+        try:
+            with self._lock():
+                update = None
+                if incremental and not self.backend.encrypted(self.reader):
+                    update = self.backend.output(self.reader)
+                if update is not None:
+                    attempt = None if stats is None else DocumentStats(self.begin, self.end)
+                    for page in self.pages:
+                        page.stamp(True, update, attempt, compress, forms)
+                    if self.backend.writable(update):
+                        started = time.perf_counter()
+                        with target as out_file:
+                            position = out_file.tell()
+                            self.backend.write(update, out_file, _contents(self.file))
+                            written = out_file.tell() - position
+                        if stats is not None:
+                            stats.update(attempt)
+                            stats.timings["write"] += time.perf_counter() - started
+                            stats.counters["bytes_written"] += written
+                        return filename
+
+                output = self._output(self.pages, append_only or incremental, stats, compress, forms)
+                started = time.perf_counter()
+                with target as out_file:
+                    position = out_file.tell()
+                    self.backend.write(output, out_file, object_streams=object_streams, compress=compress)
+                    written = out_file.tell() - position
+                if stats is not None:
+                    stats.timings["write"] += time.perf_counter() - started
+                    stats.counters["bytes_written"] += written
+        finally:
+            if not loaded:
+                self._unload()  # pages built only for this save are not kept around
+        return filename
 
-        if os.path.exists(filename) and not overwrite:
-            raise FileExistsError("PDF file {} already exists and overwrite is disabled.".format(filename))
+    def _stamp_pages(self, start, stop, append_only=False, stats=None, compress=None, forms=False):
+        """
+        Stamp a range of pages into a PDF of their own, to be assembled with the other ranges of the document.
 
-        with open(filename, "wb") as out_file:
-            writer = PdfFileWriter()
-            for page in self:
-                page.apply()
-                writer.addPage(page.page)
-            writer.write(out_file)
-        return filename
+        Args:
+            start (int): Index of the first page.
+            stop (int): Index after the last page.
+            append_only (bool): See `save`.
+            stats (marisol.DocumentStats): Record the timings and counters of stamping the range into it.
+            compress (int): See `save`.
+            forms (bool): See `save`.
+
+        Returns:
+            bytes: The PDF of the stamped pages.
+        """
+        loaded = self.pages is not None
+        self._load()
+        if stats is not None:
+            stats.timings["load"] += self.load_seconds
+            if start == 0:
+                # every range parses the whole PDF, but it is the same file, so it is counted for the first range only
+                stats.counters["bytes_read"] += _size(self.file)
+        try:
+            with self._lock():
+                output = self._output(self.pages[start:stop], append_only, stats, compress, forms)
+                started = time.perf_counter()
+                out_file = io.BytesIO()
+                self.backend.write(output, out_file)
+            if stats is not None:
+                stats.timings["write"] += time.perf_counter() - started
+        finally:
+            if not loaded:
+                self._unload()
+        return out_file.getvalue()
+
+    def _output(self, pages, append_only=False, stats=None, compress=None, forms=False):
+        """
+        Stamp pages into a new output file of the backend.
+
+        Args:
+            pages (list): The pages to stamp.
+            append_only (bool): See `save`.
+            stats (marisol.DocumentStats): Record the timings of stamping the pages into it.
+            compress (int): See `save`.
+            forms (bool): See `save`.
+
+        Returns:
+            Output file holding the stamped pages, see `Backend.output`.
+        """
+        output = self.backend.output()
+        for page in pages:
+            page.stamp(append_only, output, stats, compress, forms)
+        return output
+
+    async def save_async(self, filename=None, overwrite=False, append_only=False, incremental=False, compress=None,
+                         object_streams=False, executor=None, forms=False):
+        """
+        Applies the bates numbers and saves to file on an executor, without blocking the event loop.
+
+        Args:
+            filename (str): Path where the PDF should be saved.
+            overwrite (bool): Switch to allow overwriting of existing files.
+            append_only (bool): See `save`.
+            incremental (bool): See `save`.
+            compress (int): See `save`.
+            object_streams (bool): See `save`.
+            executor (concurrent.futures.Executor): Executor to save on.  Defaults to the event loop's default
+                executor.
+            forms (bool): See `save`.
+
+        Returns:
+            str: Path where the file was saved.
+
+        Raises:
+            FileExistsError: When the file already exists and overwrite is not enabled.
+        """
+        loop = asyncio.get_event_loop()
+        save = functools.partial(self.save, filename, overwrite, append_only, incremental, compress=compress,
+                                 object_streams=object_streams, forms=forms)
+        return await loop.run_in_executor(executor, save)
 
     def add_overlay(self, overlay):
         """
@@ -237,13 +970,15 @@ class Document(object):
 
 class Page(object):
 
+    __slots__ = ("document", "page", "prefix", "fill", "start", "height", "width", "redactions", "_number")
+
     def __init__(self, document, page, prefix, fill, start):
         """
-        Represents a page within a document that will be bates numbered.
+        Represents a page within a document that will be bates numbered.  Nothing is rendered until the page is applied.
 
         Args:
             document (Marisol.Document):  Parent document
-            page (PyPdf2.pdf.PageObject): PDF page associated with this page
+            page: PDF page associated with this page, as read by the document's backend
             prefix (str): Bates number prefix.
             fill (int): Length to zero-pad number to.
             start (int): Number to start with.
@@ -254,13 +989,10 @@ class Page(object):
         self.fill = fill
         self.start = start
 
-        self.height = float(self.page.mediaBox.upperRight[1])
-        self.width = float(self.page.mediaBox.lowerRight[0])
-
-        self.canvas_file = io.BytesIO()
-        self.canvas = canvas.Canvas(self.canvas_file, pagesize=(self.width, self.height))
+        self.width, self.height = document.backend.page_size(page)
 
         self.redactions = []
+        self._number = None
 
     def __str__(self):
         return self.number
@@ -280,31 +1012,132 @@ class Page(object):
         self.redactions.append(redaction)
         return self
 
-    def apply(self):
+    def apply(self, append_only=False):
         """
         Applies all requested overlays to the page
 
+        Args:
+            append_only (bool): Append the overlays to the page contents as a separate stream, leaving the existing
+                content streams untouched, instead of merging them with `mergePage`.  Overlays that have to be drawn
+                with reportlab are always merged.
+
         Returns:
             bool
         """
+        self.page = self.stamp(append_only)
+        return True
+
+    def stamp(self, append_only=False, output=None, stats=None, compress=None, forms=False):
+        """
+        Applies all requested overlays to a copy of the page, leaving this page unchanged so it can be saved again.
+
+        Args:
+            append_only (bool): See `apply`.
+            output: Output file of the document's backend to add the stamped page to, sharing the font and resource
+                objects of its other pages.  The stamp carries its own copy of the font when not given.
+            stats (marisol.DocumentStats): Record the timings of stamping this page into it.
+            compress (int): zlib level to Flate-compress the new content streams of the page at, if any.
+            forms (bool): Draw the static overlays and redactions into Form XObjects of `output`, shared with the
+                other pages drawing the same ones, see `Document.save`.
+
+        Returns:
+            The stamped page.
+        """
+        page_stats = None if stats is None else stats.page(self.number)
+        backend = self.document.backend
+
+        parts = self._parts()
+        if parts is None:
+            overlay_page = backend.overlay(self._render(page_stats))
+            if page_stats is not None:
+                page_stats.lap("reparse")
+            page = backend.merge(output, self.page, overlay_page, compress)
+        else:
+            if page_stats is not None:
+                page_stats.lap("render")
+            operators = parts if forms else b"\n".join(part for part, shared in parts)
+            content = None
+            if not append_only and self.document.entry is not None:
+                content = self.document.entry.content(self.start - self.document.start)
+            page = backend.stamp(output, self.page, operators, append_only, content, compress)
+
+        if page_stats is not None:
+            page_stats.lap("merge")
+            page_stats.redactions = len(self.redactions)
+            stats.finish_page(page_stats)
+        return page
+
+    def _operators(self):
+        """
+        Generate the PDF drawing operators for the overlays and redactions of this page directly, without reportlab.
+
+        Returns:
+            bytes: The content stream, or None if any overlay or redaction is not supported by the fast path.
+        """
+        parts = self._parts()
+        return None if parts is None else b"\n".join(part for part, shared in parts)
+
+    def _parts(self):
+        """
+        The drawing operators of `_operators`, one part per overlay and redaction.  Static overlays and redactions
+        draw the same on every page of the same size and come from a cache (see `stamp_cache_info`), the bates number
+        is drawn for each page.
+
+        Returns:
+            list: (operators, shared) for each overlay and redaction in drawing order, or None if any of them is not
+                supported by the fast path.
+        """
+        pagesize = (self.width, self.height)
+        parts = []
+        try:
+            for overlay in self.document.overlays.values():
+                if overlay is None:
+                    continue
+                if type(overlay) not in (BatesOverlay, StaticOverlay):
+                    return None  # custom overlays may draw anything, leave them to reportlab
+                if isinstance(overlay, BatesOverlay):
+                    # a new overlay rather than setting the text of the document's, which other threads may be
+                    # stamping pages of at the same time
+                    overlay = BatesOverlay(self.number, overlay.area)
+                parts.append((overlay.operators(pagesize), isinstance(overlay, StaticOverlay)))
+
+            for redaction in self.redactions:
+                if type(redaction) is not Redaction:
+                    return None
+                parts.append((redaction.operators(), True))
+        except UnicodeEncodeError:
+            return None  # text the standard Helvetica encoding cannot represent
+        return parts
+
+    def _render(self, page_stats=None):
+        """
+        Draw the overlays and redactions of this page with reportlab.
+
+        Args:
+            page_stats (marisol.stats.PageStats): Record the drawing time into it.
+
+        Returns:
+            bytes: One-page PDF containing only the overlays and redactions.
+        """
+        canvas_file = io.BytesIO()
+        c = canvas.Canvas(canvas_file, pagesize=(self.width, self.height))
+
         for overlay in self.document.overlays.values():
             if isinstance(overlay, BatesOverlay):
+                overlay = copy.copy(overlay)  # see `_parts`
                 overlay.text = self.number
-                overlay.apply(self.canvas)
+                overlay.apply(c)
             elif isinstance(overlay, GenericTextOverlay):
-                overlay.apply(self.canvas)
+                overlay.apply(c)
 
         for redaction in self.redactions:
-            redaction.apply(self.canvas)
-
-        self.canvas.showPage()
-        self.canvas.save()
+            redaction.apply(c)
 
-        self.canvas_file.seek(0)
-        reader = PdfFileReader(self.canvas_file)
-        overlay_page = reader.getPage(0)
-        self.page.mergePage(overlay_page)
-        return True
+        c.showPage()
+        c.save()
+        if page_stats is not None:
+            page_stats.lap("render")
+        return canvas_file.getvalue()
 
     @property
     def number(self):
@@ -314,9 +1147,9 @@ class Page(object):
         Returns:
             str: Bates number.
         """
-        num = str(self.start)
-        num = num.zfill(self.fill)
-        return "{prefix}{num}".format(prefix=self.prefix, num=num)
+        if self._number is None:
+            self._number = _format(self.prefix, self.fill, self.start)
+        return self._number
 
 
 class GenericTextOverlay(object):
@@ -335,6 +1168,24 @@ class GenericTextOverlay(object):
         position_left, position_bottom = self.position(c)
         c.drawString(position_left, position_bottom, self.text)
 
+    def operators(self, pagesize):
+        """
+        PDF operators drawing the text in black 12pt Helvetica, as `apply` does on a fresh canvas.
+
+        Args:
+            pagesize (tuple): width and height of the page
+
+        Returns:
+            bytes: content stream operators
+
+        Raises:
+            UnicodeEncodeError: When the text can not be drawn with the standard Helvetica encoding.
+        """
+        position_left, position_bottom = self._locate(pagesize, stringWidth(self.text, "Helvetica", 12))
+        return "0 g BT /{font} 12 Tf 1 0 0 1 {left} {bottom} Tm ({text}) Tj ET".format(
+            font=_FONT_NAME, left=_pdf_number(position_left), bottom=_pdf_number(position_bottom),
+            text=_pdf_string(self.text)).encode("cp1252")
+
     def position(self, c):
         """
         Get the appropriate position on the page for the current text given an area.
@@ -342,11 +1193,24 @@ class GenericTextOverlay(object):
         Args:
             c (canvas.Canvas): Page to get the positioning for
 
+        Returns:
+            tuple: the position
+        """
+        return self._locate(c._pagesize, c.stringWidth(self.text))
+
+    def _locate(self, pagesize, text_width):
+        """
+        Position of text of the given width within the area of a page of the given size.
+
+        Args:
+            pagesize (tuple): width and height of the page
+            text_width (float): width of the text in points
+
         Returns:
             tuple: the position
         """
         if self.area in [Area.TOP_LEFT, Area.TOP_RIGHT]:  # top
-            from_bottom = c._pagesize[1]-15  # 15 down from height of page
+            from_bottom = pagesize[1]-15  # 15 down from height of page
         elif self.area in [Area.BOTTOM_LEFT, Area.BOTTOM_RIGHT]:  # bottom
             from_bottom = 15  # 15 up from bottom of page
 
@@ -354,8 +1218,8 @@ class GenericTextOverlay(object):
             from_left = 15
         elif self.area in [Area.TOP_RIGHT, Area.BOTTOM_RIGHT]:  # right
             offset = 15  # initial offset
-            offset += c.stringWidth(self.text)  # offset for text length
-            from_left = c._pagesize[0]-offset
+            offset += text_width  # offset for text length
+            from_left = pagesize[0]-offset
 
         return from_left, from_bottom
 
@@ -365,7 +1229,13 @@ class BatesOverlay(GenericTextOverlay):
 
 
 class StaticOverlay(GenericTextOverlay):
-    pass
+
+    def operators(self, pagesize):
+        """
+        See `GenericTextOverlay.operators`.  The text is the same on every page, so the operators are cached by text,
+        area and page size.
+        """
+        return _static_operators(self.text, self.area, tuple(pagesize))
 
 
 class Redaction(object):
@@ -411,7 +1281,437 @@ class Redaction(object):
             c.setFillColorRGB(*self.style.text)
             c.drawCentredString(self.center[0], self.center[1], self.text)
 
+    def operators(self):
+        """
+        PDF operators drawing the redaction, as `apply` does on a canvas.  Cached by position, size, text and style,
+        since the same redaction is often placed on many pages.
+
+        Returns:
+            bytes: content stream operators
+
+        Raises:
+            UnicodeEncodeError: When the text can not be drawn with the standard Helvetica encoding.
+        """
+        return _redaction_operators(tuple(self.position), tuple(self.size), self.text, self.style)
+
+    def _operators(self):
+        operators = ["{} RG".format(_pdf_color(self.style.stroke)),
+                     "{} rg".format(_pdf_color(self.style.fill)),
+                     "n {} re B*".format(" ".join(_pdf_number(x) for x in self.position+self.size))]
+
+        if self.text is not None:
+            left = self.center[0] - stringWidth(self.text, "Helvetica", 10)/2
+            operators += ["{} RG".format(_pdf_color(self.style.text)),
+                          "{} rg".format(_pdf_color(self.style.text)),
+                          "BT /{font} 10 Tf 1 0 0 1 {left} {bottom} Tm ({text}) Tj ET".format(
+                              font=_FONT_NAME, left=_pdf_number(left), bottom=_pdf_number(self.center[1]),
+                              text=_pdf_string(self.text))]
+        return "\n".join(operators).encode("cp1252")
+
+
+@functools.lru_cache(maxsize=STAMP_CACHE_SIZE)
+def _static_operators(text, area, pagesize):
+    """
+    Drawing operators of a static overlay, see `StaticOverlay.operators`.
+    """
+    return GenericTextOverlay(text, area).operators(pagesize)
+
+
+@functools.lru_cache(maxsize=STAMP_CACHE_SIZE)
+def _redaction_operators(position, size, text, style):
+    """
+    Drawing operators of a redaction, see `Redaction.operators`.
+    """
+    return Redaction(position, size, text, style)._operators()
+
+
+def stamp_cache_info():
+    """
+    Hits and misses of the caches of drawing operators for static overlays and redactions, in this process.  With
+    the process pool each worker process has caches of its own.
+
+    Returns:
+        dict: "hits", "misses", "size" (operators held), "maxsize" and "hit_rate" (hits out of all lookups).
+    """
+    infos = [_static_operators.cache_info(), _redaction_operators.cache_info()]
+    hits = sum(info.hits for info in infos)
+    misses = sum(info.misses for info in infos)
+    return {"hits": hits, "misses": misses,
+            "size": sum(info.currsize for info in infos),
+            "maxsize": sum(info.maxsize for info in infos),
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0}
+
+
+def _pdf_number(number):
+    """
+    Format a number for a content stream, without trailing zeros.
+    """
+    text = "{:.4f}".format(number).rstrip("0").rstrip(".")
+    return "0" if text == "-0" else text
+
+
+def _pdf_string(text):
+    """
+    Escape text for use as a PDF literal string.
+    """
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)").replace("\r", "\\r")
+
+
+def _pdf_color(rgb):
+    """
+    Format an RGB color for the RG and rg operators.
+    """
+    return " ".join(_pdf_number(x) for x in rgb)
+
+
+def _executor(executor, workers):
+    """
+    Create the pool for an executor name.
+
+    Args:
+        executor (str): "thread" or "process".
+        workers (int): Number of workers, or None for the executor's default.
+
+    Returns:
+        concurrent.futures.Executor
+
+    Raises:
+        ValueError: When the executor is not "thread" or "process".
+    """
+    if executor == "thread":
+        return futures.ThreadPoolExecutor(workers)
+    if executor == "process":
+        return futures.ProcessPoolExecutor(workers)
+    raise ValueError("Unknown executor {}, expected 'thread' or 'process'.".format(executor))
+
+
+def _stamp_range(document, start, stop, options, submitted=None):
+    """
+    Stamp a range of pages of a document that is saved in parts.  Module-level so that it can be shipped to a process
+    pool.
+
+    Args:
+        document (Document): The document.
+        start (int): Index of the first page.
+        stop (int): Index after the last page.
+        options (dict): Keyword arguments for Document.save.
+        submitted (float): When collecting stats, the time.time() the range was submitted to the executor.
+
+    Returns:
+        (bytes, DocumentStats): The PDF of the stamped pages, None when the document's file already exists and
+            overwrite is not enabled, or the error raised stamping them, and the stats of the range when collecting
+            them.
+    """
+    stats = None
+    if submitted is not None:
+        stats = DocumentStats(document.begin, document.end)
+        stats.timings["queue"] = max(0.0, time.time() - submitted)
+    filename = "{begin}.pdf".format(begin=document.begin)
+    sink = options["sink"]  # None when the sink is in the parent process, which has checked it already
+    if sink is not None and sink.exists(filename) and not options["overwrite"]:
+        return None, stats
+
+    try:
+        return document._stamp_pages(start, stop, options["append_only"], stats, options["compress"],
+                                     options["forms"]), stats
+    except Exception as e:
+        return e, stats
+
+
+def _assemble(pool, document, parts, options, deferred=False):
+    """
+    Submit the assembly of a document from its stamped ranges.
+
+    Args:
+        pool (concurrent.futures.Executor): Executor to assemble the document on.
+        document (Document): The document.
+        parts (dict): First page index of each range to the result of _stamp_range for it.
+        options (dict): Keyword arguments for Document.save.
+        deferred (bool): Assemble the document in memory and send it back, see `_in_memory`.
+
+    Returns:
+        concurrent.futures.Future: Resolving to the file name saved to and success or failure, plus the
+            DocumentStats when collecting stats.
+    """
+    submitted = time.time()
+    ranges = [parts[start] for start in sorted(parts)]
+    stats = ranges[0][1]
+    if stats is not None:
+        for data, range_stats in ranges[1:]:
+            stats.update(range_stats)
+    filename = "{begin}.pdf".format(begin=document.begin)
+    parts = [data for data, range_stats in ranges]
+    if deferred:
+        return pool.submit(_in_memory, _assemble_document, filename, parts, options=options, stats=stats,
+                           backend=document.backend, submitted=submitted)
+    return pool.submit(_assemble_document, filename, parts, options, stats, document.backend, submitted)
+
+
+def _assemble_document(filename, parts, options, stats=None, backend=None, submitted=None):
+    """
+    Write a document from the PDFs of its stamped ranges.  Module-level so that it can be shipped to a process pool.
+
+    Args:
+        filename (str): Name the PDF should be saved under in the sink of the options.
+        parts (list): PDF of each stamped range, in page order.
+        options (dict): Keyword arguments for Document.save.
+        stats (DocumentStats): Stats of the stamped ranges, to add the writing to.
+        backend (marisol.Backend): Backend the ranges were stamped with.
+        submitted (float): The time.time() the assembly was submitted to the executor, added to the queue time of
+            the stats.
+
+    Returns:
+        (str, bool): The file name saved to, "EXISTS" or the error raised stamping or writing it, and success or
+            failure, plus the DocumentStats when collecting stats.
+    """
+    if stats is not None and submitted is not None:
+        stats.timings["queue"] += max(0.0, time.time() - submitted)
+    errors = [data for data in parts if isinstance(data, Exception)]
+    if errors:
+        filename, success = errors[0], False
+    elif None in parts or (options["sink"].exists(filename) and not options["overwrite"]):
+        filename, success = "EXISTS", False
+    else:
+        started = time.perf_counter()
+        try:
+            backend = get_backend(backend)
+            output = backend.output()
+            for data in parts:
+                for page in backend.pages(backend.read(io.BytesIO(data))):
+                    backend.add_page(output, page)
+            with options["sink"].open(filename) as out_file:
+                backend.write(output, out_file, object_streams=options["object_streams"],
+                              compress=options["compress"])
+                written = out_file.tell()
+        except Exception as e:
+            filename, success = e, False
+        else:
+            success = True
+            checksum = _checksum(options["sink"], filename)
+            if stats is not None:
+                stats.timings["write"] += time.perf_counter() - started
+                stats.counters["bytes_written"] += written
+                stats.checksum = checksum
+
+    if stats is None:
+        return filename, success
+    stats.filename, stats.success = filename, success
+    return filename, success, stats
+
+
+def _save_document(document, options, submitted=None):
+    """
+    Save a document, reporting an existing file or an error reading or writing it as a failure rather than raising,
+    so that one bad document does not stop the others.  Module-level so that it can be shipped to a process pool.
+
+    Args:
+        document (Document):  The document to save.
+        options (dict): Keyword arguments for Document.save.
+        submitted (float): When collecting stats, the time.time() the document was submitted to the executor.
+
+    Returns:
+        (str, bool): The file name saved to, "EXISTS" or the error raised saving it, and success or failure, plus the
+            DocumentStats when collecting stats.
+    """
+    if submitted is None:
+        try:
+            filename = document.save(**options)
+        except FileExistsError:
+            return "EXISTS", False
+        except Exception as e:
+            return e, False
+        else:
+            _checksum(options.get("sink"), filename)
+            return filename, True
+
+    stats = DocumentStats(document.begin, document.end)
+    stats.timings["queue"] = max(0.0, time.time() - submitted)
+    try:
+        stats.filename = document.save(stats=stats, **options)
+    except FileExistsError:
+        stats.filename, stats.success = "EXISTS", False
+    except Exception as e:
+        stats.filename, stats.success = e, False
+    else:
+        stats.success = True
+        stats.checksum = _checksum(options.get("sink"), stats.filename)
+    return stats.filename, stats.success, stats
+
+
+def _checksum(sink, filename):
+    """
+    Take the size and checksum of a saved document from the sink, when it computed them while writing the file (see
+    `DirectorySink.checksum`).
+
+    Returns:
+        (int, str): Size and SHA-256 checksum, or None.
+    """
+    return sink.checksum(filename) if isinstance(sink, DirectorySink) else None
+
+
+def _in_memory(function, *args, options, **kwargs):
+    """
+    Run `_save_document` or `_assemble_document` in a worker process, saving into a MemorySink of its own, and send
+    the PDF back in place of the success flag, for the parent process to write to its sink with `_deliver`.
+
+    Args:
+        function (function): The function to run.
+        options (dict): Keyword arguments for Document.save.
+
+    Returns:
+        (str, bytes): The file name, "EXISTS" or the error raised saving it, and the PDF, or None when it could not
+            be saved, plus the DocumentStats when collecting stats.
+    """
+    sink = MemorySink()
+    result = function(*args, options=dict(options, sink=sink), **kwargs)
+    return (result[0], sink.files.get(result[0]) if result[1] else None) + result[2:]
+
+
+def _deliver(sink, result):
+    """
+    Write a PDF sent back by `_in_memory` to a sink.
+
+    Args:
+        sink (marisol.Sink): The sink.
+        result (tuple): The result of `_in_memory`.
+
+    Returns:
+        (str, bool): The file name and success or failure, plus the DocumentStats when collecting stats.
+    """
+    filename, data = result[:2]
+    if data is not None:
+        with sink.open(filename) as out_file:
+            out_file.write(data)
+    return (filename, data is not None) + result[2:]
+
+
+def _open_stream(file, mapped=False):
+    """
+    Open a PDF for reading.  Paths are memory-mapped when asked to, which avoids a copy in memory but keeps a file
+    descriptor open until the map is closed, so only lazy documents, which are unloaded after each save, map them.
+    Anything else is read into memory, so the document does not depend on a file the caller may close.
+
+    Args:
+        file (str, bytes or file-like object): PDF to open.
+        mapped (bool): Memory-map paths instead of reading them.
+
+    Returns:
+        file-like object: Seekable stream for the PDF.
+    """
+    if isinstance(file, bytes):
+        return io.BytesIO(file)
+    try:
+        read = file.read
+    except AttributeError:
+        with open(file, "rb") as in_file:
+            if not mapped or os.fstat(in_file.fileno()).st_size == 0:  # empty files can not be mapped
+                return io.BytesIO(in_file.read())
+            return mmap.mmap(in_file.fileno(), 0, access=mmap.ACCESS_READ)
+    return io.BytesIO(read())
+
+
+def _contents(stream):
+    """
+    Entire contents of a stream opened by `_open_stream`, without copying it where possible.
+
+    Returns:
+        bytes-like object: The PDF.
+    """
+    if isinstance(stream, io.BytesIO):
+        return stream.getbuffer()
+    if isinstance(stream, mmap.mmap):
+        return stream
+    stream.seek(0)
+    return stream.read()
+
+
+def _size(stream):
+    """
+    Size in bytes of a stream opened by `_open_stream`.
+    """
+    if isinstance(stream, io.BytesIO):
+        return stream.getbuffer().nbytes
+    if isinstance(stream, mmap.mmap):
+        return len(stream)
+    position = stream.tell()
+    size = stream.seek(0, io.SEEK_END)
+    stream.seek(position)
+    return size
+
+
+def _count_files(paths, workers=None, executor="thread"):
+    """
+    Count the pages of many files in parallel.
+
+    Args:
+        paths (list): File names of the PDFs.
+        workers (int): The number of workers.  Defaults to the number of cores.
+        executor (str): "thread" or "process".
+
+    Returns:
+        list: The page count of each file, or the exception raised reading it.
+
+    Raises:
+        ValueError: When the executor is not "thread" or "process".
+    """
+    if executor == "thread":
+        pool = futures.ThreadPoolExecutor(workers or multiprocessing.cpu_count())
+    elif executor == "process":
+        pool = futures.ProcessPoolExecutor(workers)
+    else:
+        raise ValueError("Unknown executor {}, expected 'thread' or 'process'.".format(executor))
+    with pool:
+        return list(pool.map(_count_file, paths))
+
+
+def _count_file(path):
+    """
+    Count the pages of a PDF file, returning the error instead of raising it.  Module-level so that it can be shipped
+    to a process pool.
+
+    Args:
+        path (str): PDF file name.
+
+    Returns:
+        int or Exception: Number of pages, or the error raised while reading the file.
+    """
+    try:
+        with open(path, "rb") as in_file:
+            return _count_pages(in_file)
+    except Exception as e:
+        return e
+
+
+def _count_pages(stream):
+    """
+    Count the pages of a PDF the way loading it does, by the /Page leaves of its page tree.  The /Count of the root
+    is not trusted, a file whose count is wrong would otherwise be numbered for pages it does not have.
+
+    Args:
+        stream (file-like object): Seekable PDF stream.
+
+    Returns:
+        int: Number of pages.
+    """
+    return PdfFileReader(stream).numPages
+
 
 class OutsideBoundariesError(ValueError):
     """Raised when an item is drawn outside the page boundaries."""
-    pass
\ No newline at end of file
+    pass
+
+
+class RedactionImportError(ValueError):
+    """Raised when redactions added in bulk can not be added."""
+
+    def __init__(self, errors):
+        """
+        Args:
+            errors (list): Row number and exception of each row that could not be added.
+        """
+        self.errors = errors
+        lines = ["{} redactions could not be added:".format(len(errors))]
+        lines.extend("  row {}: {}".format(num, error) for num, error in errors[:20])
+        if len(errors) > 20:
+            lines.append("  ... and {} more".format(len(errors) - 20))
+        super().__init__("\n".join(lines))
\ No newline at end of file
@@ -0,0 +1,121 @@
+import json
+
+
+class Plan(object):
+
+    def __init__(self, prefix, fill, start, documents=None):
+        """
+        Bates numbers assigned to an ordered list of input files before any of them is stamped, so that one production
+        can be split between several machines.  Every machine stamps a disjoint shard of the plan (see
+        `Marisol.from_plan`), and together the shards produce exactly the files a single machine would.
+
+        Args:
+            prefix (str): Bates number prefix.
+            fill (int): Length to zero-pad numbers to.
+            start (int): Number of the first page of the plan.
+            documents (list): Dicts with the "file", "start" and "pages" of each document, in bates order.
+        """
+        self.prefix = prefix
+        self.fill = fill
+        self.start = start
+        self.documents = []
+        self.failures = []  # (path, exception) of the files left out of the plan because they could not be read
+
+        for document in documents or []:
+            self.add(document["file"], document["pages"])
+
+    def __iter__(self):
+        return iter(self.documents)
+
+    def __len__(self):
+        return len(self.documents)
+
+    @property
+    def pages(self):
+        """
+        Total number of pages in the plan.
+
+        Returns:
+            int
+        """
+        return self.next - self.start
+
+    @property
+    def next(self):
+        """
+        Number of the first page after the plan.
+
+        Returns:
+            int
+        """
+        if not self.documents:
+            return self.start
+        return self.documents[-1]["start"] + self.documents[-1]["pages"]
+
+    def add(self, file, pages):
+        """
+        Add a document, numbered after the documents already in the plan.
+
+        Args:
+            file (str): Path of the PDF.
+            pages (int): Number of pages in it.
+
+        Returns:
+            dict: The "file", "start", "pages", "begin" and "end" of the document.
+        """
+        start = self.next
+        document = {"file": file, "start": start, "pages": pages,
+                    "begin": self._number(start), "end": self._number(start + pages - 1)}
+        self.documents.append(document)
+        return document
+
+    def shard(self, shard, shards):
+        """
+        The documents one machine stamps when the plan is split between several.  Shards are consecutive runs of
+        documents holding about the same number of pages.
+
+        Args:
+            shard (int): Index of the shard, from 0.
+            shards (int): Number of shards.
+
+        Returns:
+            list: The documents of the shard, in bates order.
+
+        Raises:
+            ValueError: When the shard is not between 0 and shards - 1.
+        """
+        if not 0 <= shard < shards:
+            raise ValueError("Shard {} does not exist, expected 0 to {}.".format(shard, shards - 1))
+        pages = max(self.pages, 1)
+        # each document goes to the shard holding its middle page
+        return [document for document in self.documents
+                if (2 * (document["start"] - self.start) + document["pages"]) * shards // (2 * pages) == shard]
+
+    def save(self, path):
+        """
+        Write the plan to a JSON file.
+
+        Args:
+            path (str): Path of the plan file.
+        """
+        with open(path, "w", encoding="utf-8") as out_file:
+            json.dump({"prefix": self.prefix, "fill": self.fill, "start": self.start, "documents": self.documents},
+                      out_file, indent=1)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a plan written by `save`.
+
+        Args:
+            path (str): Path of the plan file.
+
+        Returns:
+            Plan
+        """
+        with open(path, encoding="utf-8") as in_file:
+            data = json.load(in_file)
+        return cls(data["prefix"], data["fill"], data["start"], data["documents"])
+
+    def _number(self, num):
+        return "{prefix}{num}".format(prefix=self.prefix, num=str(num).zfill(self.fill))
@@ -0,0 +1,59 @@
+import csv
+import json
+import os
+
+try:
+    import numpy
+except ImportError:  # the bounds check falls back to plain Python
+    numpy = None
+
+
+def read_redactions(file, format=None):
+    """
+    Read redactions exported by a review platform.  CSV files have a header row naming the columns, and JSON files
+    hold a list of objects.  The columns are "bates", "x", "y", "width" and "height", and optionally "text" and
+    "style" (the name of a RedactionStyle).
+
+    Args:
+        file (str or file-like object): Path or open text file to read.
+        format (str): "csv" or "json".  Taken from the extension when reading from a path.
+
+    Returns:
+        list: a dict for each redaction.
+
+    Raises:
+        ValueError: When the format is not "csv" or "json".
+    """
+    if isinstance(file, str):
+        format = format or os.path.splitext(file)[1].lstrip(".").lower()
+        with open(file, newline="", encoding="utf-8") as in_file:
+            return read_redactions(in_file, format)
+
+    if format == "csv":
+        return list(csv.DictReader(file))
+    if format == "json":
+        return json.load(file)
+    raise ValueError("Unknown redaction format {}, expected 'csv' or 'json'.".format(format))
+
+
+def outside_boundaries(boxes, pages):
+    """
+    Find the boxes that do not fit on their pages, checking all of them at once.
+
+    Args:
+        boxes (list): (from-left, from-bottom, width, height) of each box.
+        pages (list): (width, height) of the page of each box.
+
+    Returns:
+        list: indexes of the boxes outside their pages.
+    """
+    if not boxes:
+        return []
+    if numpy is not None:
+        boxes = numpy.asarray(boxes, dtype=float)
+        pages = numpy.asarray(pages, dtype=float)
+        outside = (boxes[:, 0] + boxes[:, 2] > pages[:, 0]) | (boxes[:, 1] + boxes[:, 3] > pages[:, 1])
+        return numpy.flatnonzero(outside).tolist()
+    return [num for num, ((x, y, width, height), (page_width, page_height)) in enumerate(zip(boxes, pages))
+            if x + width > page_width or y + height > page_height]
+
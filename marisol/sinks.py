@@ -0,0 +1,260 @@
+import contextlib
+import hashlib
+import io
+import os
+import tarfile
+import threading
+import time
+import zipfile
+
+
+class Sink(object):
+    """
+    Where saved documents are written.  Documents are written under a name, such as "TEST000001.pdf", and only show up
+    in the sink once they have been written completely.  Sinks can be fed by many threads at once.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        Finish writing the sink.
+        """
+
+    def exists(self, name):
+        """
+        Returns:
+            bool: Whether a document has already been written under the name.
+        """
+        raise NotImplementedError
+
+    def open(self, name):
+        """
+        Context manager writing a document.
+
+        Args:
+            name (str): Name of the document.
+
+        Returns:
+            context manager: Yields a seekable binary file to write the PDF to.  The document is added when the block
+                exits without an exception.
+        """
+        raise NotImplementedError
+
+
+class DirectorySink(Sink):
+
+    def __init__(self, directory=""):
+        """
+        Write each document to a file of its own, as `Document.save` does by default.  The size and SHA-256 checksum
+        of each file are computed while it is written and kept in `checksums` until they are taken with `checksum`,
+        so that a journal does not have to read the file back.
+
+        Args:
+            directory (str): Directory to write the files to.  Defaults to the current directory.
+        """
+        self.directory = directory
+        self.checksums = {}
+
+    def checksum(self, name):
+        """
+        Take the size and checksum recorded while writing a document.
+
+        Args:
+            name (str): Name of the document.
+
+        Returns:
+            (int, str): Size in bytes and SHA-256 checksum as a hex string, or None when the document was not written
+                by this sink, or the file was seeked while it was written.
+        """
+        return self.checksums.pop(name, None)
+
+    def exists(self, name):
+        return os.path.exists(self.path(name))
+
+    @contextlib.contextmanager
+    def open(self, name):
+        with _replacing(self.path(name)) as out_file:
+            hashing = _Hashing(out_file)
+            yield hashing
+        if hashing.digest is not None:
+            self.checksums[name] = (hashing.size, hashing.digest.hexdigest())  # a single store, safe across threads
+
+    def path(self, name):
+        """
+        Returns:
+            str: Path of the file for a document.
+        """
+        return os.path.join(self.directory, name)
+
+
+class MemorySink(Sink):
+
+    def __init__(self):
+        """
+        Keep each document in memory, as bytes in `files`.
+        """
+        self.files = {}
+        self.lock = threading.Lock()
+
+    def __contains__(self, name):
+        return name in self.files
+
+    def __getitem__(self, name):
+        return self.files[name]
+
+    def __len__(self):
+        return len(self.files)
+
+    def exists(self, name):
+        return name in self.files
+
+    @contextlib.contextmanager
+    def open(self, name):
+        out_file = io.BytesIO()
+        yield out_file
+        with self.lock:
+            self.files[name] = out_file.getvalue()
+
+
+class _ArchiveSink(Sink):
+
+    def __init__(self, file):
+        """
+        Base of sinks writing every document into one archive, which is written as a stream and never read back.  Each
+        document is written to memory first and then added to the archive in one go, so many threads can feed the
+        archive at once.
+
+        Args:
+            file (str or file-like object): Path or binary file to write the archive to.  The file does not have to
+                be seekable.
+        """
+        self.names = set()
+        self.lock = threading.Lock()
+
+    def close(self):
+        with self.lock:
+            self._close()
+
+    def exists(self, name):
+        return name in self.names
+
+    @contextlib.contextmanager
+    def open(self, name):
+        out_file = io.BytesIO()
+        yield out_file
+        with self.lock:
+            self._add(name, out_file.getvalue())
+            self.names.add(name)
+
+    def _add(self, name, data):
+        raise NotImplementedError
+
+    def _close(self):
+        raise NotImplementedError
+
+
+class ZipSink(_ArchiveSink):
+
+    def __init__(self, file, compression=zipfile.ZIP_STORED):
+        """
+        Write the documents into a ZIP archive.  See `_ArchiveSink`.
+
+        Args:
+            file (str or file-like object): Path or binary file to write the archive to.
+            compression (int): zipfile compression method.  PDFs are mostly compressed already, so they are stored
+                as they are by default.
+        """
+        super().__init__(file)
+        self.archive = zipfile.ZipFile(file, "w", compression, allowZip64=True)
+
+    def _add(self, name, data):
+        info = zipfile.ZipInfo(name, time.localtime()[:6])
+        info.compress_type = self.archive.compression  # a ZipInfo is stored unless told otherwise
+        self.archive.writestr(info, data)
+
+    def _close(self):
+        self.archive.close()
+
+
+class TarSink(_ArchiveSink):
+
+    def __init__(self, file, compression=""):
+        """
+        Write the documents into a TAR archive.  See `_ArchiveSink`.
+
+        Args:
+            file (str or file-like object): Path or binary file to write the archive to.
+            compression (str): "", "gz", "bz2" or "xz".
+        """
+        super().__init__(file)
+        mode = "w|" + compression
+        if isinstance(file, str):
+            self.archive = tarfile.open(file, mode)
+        else:
+            self.archive = tarfile.open(fileobj=file, mode=mode)
+
+    def _add(self, name, data):
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = time.time()
+        self.archive.addfile(info, io.BytesIO(data))
+
+    def _close(self):
+        self.archive.close()
+
+
+@contextlib.contextmanager
+def _replacing(filename):
+    """
+    Open a temporary file next to `filename` for writing, and move it into place once it has been written completely.
+    An interrupted save leaves no partial output behind under the final name.
+
+    Args:
+        filename (str): Path of the output file.
+
+    Yields:
+        file: The temporary file.
+    """
+    part = "{}.part".format(filename)
+    try:
+        with open(part, "wb") as out_file:
+            yield out_file
+        os.replace(part, filename)
+    except BaseException:
+        if os.path.exists(part):
+            os.remove(part)
+        raise
+
+
+class _Hashing(object):
+
+    def __init__(self, file):
+        """
+        Binary file wrapper computing the size and SHA-256 checksum of what is written through it.  Writers only
+        append, so seeking gives up on the checksum rather than track rewritten bytes.
+
+        Args:
+            file (file-like object): File to write to.
+        """
+        self.file = file
+        self.size = 0
+        self.digest = hashlib.sha256()
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+    def seek(self, *args):
+        self.digest = None
+        return self.file.seek(*args)
+
+    def write(self, data):
+        written = self.file.write(data)
+        if self.digest is not None:
+            self.digest.update(data)
+            self.size += memoryview(data).nbytes
+        return written
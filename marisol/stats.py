@@ -0,0 +1,134 @@
+from collections import Counter
+
+import time
+
+
+class PageStats(object):
+
+    def __init__(self, number):
+        """
+        Timings for stamping one page.
+
+        Args:
+            number (str): Bates number of the page.
+        """
+        self.number = number
+        self.timings = Counter()
+        self.redactions = 0
+        self._last = time.perf_counter()
+
+    def lap(self, stage):
+        """
+        Record the time since the previous lap, or since the page was started, against a stage.
+
+        Args:
+            stage (str): Name of the stage that just finished.
+        """
+        now = time.perf_counter()
+        self.timings[stage] += now - self._last
+        self._last = now
+
+
+class DocumentStats(object):
+
+    def __init__(self, begin, end):
+        """
+        Timings and counters for saving one document.
+
+        Stages are "queue" (waiting for a worker), "load" (parsing the PDF and building pages), "render" (drawing the
+        overlays), "reparse" (reading back overlays drawn with reportlab), "merge" (adding overlays to the pages) and
+        "write" (writing the output file).  Counters are "bytes_read", "bytes_written", "pages" and "redactions".
+
+        Args:
+            begin (str): Beginning bates number of the document.
+            end (str): Ending bates number of the document.
+        """
+        self.begin = begin
+        self.end = end
+        self.filename = None
+        self.success = None
+        self.checksum = None  # (size, sha256) of the file, when the sink computed them while writing it
+
+        self.timings = Counter()
+        self.counters = Counter()
+        self.pages = []
+
+    def __str__(self):
+        return "{begin} - {end}: {seconds:.3f}s".format(begin=self.begin, end=self.end, seconds=self.seconds)
+
+    @property
+    def seconds(self):
+        """
+        Total time spent on the document, excluding the time spent waiting for a worker.
+
+        Returns:
+            float
+        """
+        return sum(seconds for stage, seconds in self.timings.items() if stage != "queue")
+
+    def page(self, number):
+        """
+        Start recording a page.
+
+        Args:
+            number (str): Bates number of the page.
+
+        Returns:
+            PageStats: The page record.
+        """
+        page = PageStats(number)
+        self.pages.append(page)
+        return page
+
+    def update(self, other):
+        """
+        Add the timings, counters and pages recorded in another record of the same document.
+
+        Args:
+            other (DocumentStats): The other record.
+        """
+        self.timings.update(other.timings)
+        self.counters.update(other.counters)
+        self.pages.extend(other.pages)
+
+    def finish_page(self, page):
+        """
+        Add the timings and counters of a finished page to the document totals.
+
+        Args:
+            page (PageStats): The page record.
+        """
+        self.timings.update(page.timings)
+        self.counters["pages"] += 1
+        self.counters["redactions"] += page.redactions
+
+
+class SaveStats(object):
+
+    def __init__(self):
+        """
+        Aggregated timings and counters for saving a collection.
+        """
+        self.documents = []
+        self.timings = Counter()
+        self.counters = Counter()
+        self.seconds = 0.0
+
+    def __str__(self):
+        lines = ["{} documents, {} pages in {:.3f}s".format(len(self.documents), self.counters["pages"], self.seconds)]
+        for stage, seconds in sorted(self.timings.items(), key=lambda item: -item[1]):
+            lines.append("  {:<10}{:>10.3f}s".format(stage, seconds))
+        for counter, value in sorted(self.counters.items()):
+            lines.append("  {:<14}{:>10}".format(counter, value))
+        return "\n".join(lines)
+
+    def add(self, document):
+        """
+        Add the record of a saved document.
+
+        Args:
+            document (DocumentStats): The document record.
+        """
+        self.documents.append(document)
+        self.timings.update(document.timings)
+        self.counters.update(document.counters)
@@ -17,6 +17,11 @@ install_requires = [
     'reportlab==3.3.0'
 ]
 
+extras_require = {
+    'numpy': ['numpy'],
+    'pypdf': ['pypdf>=4.0']
+}
+
 setup(
     name='Marisol',
     version=marisol.__version__,
@@ -28,7 +33,12 @@ setup(
     packages=['marisol'],
     zip_safe=True,
     platforms='any',
+    python_requires='>=3.7',
     install_requires=install_requires,
+    extras_require=extras_require,
+    entry_points={
+        'console_scripts': ['marisol=marisol.cli:main']
+    },
     classifiers=[
         'Development Status :: 4 - Beta',
         'Intended Audience :: Developers',
@@ -39,9 +49,12 @@ setup(
         'Operating System :: OS Independent',
         'Programming Language :: Python',
         'Programming Language :: Python :: 3 :: Only',
-        'Programming Language :: Python :: 3.4',
-        'Programming Language :: Python :: 3.5',
-        'Programming Language :: Python :: 3.6',
+        'Programming Language :: Python :: 3.7',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11',
+        'Programming Language :: Python :: 3.12',
         'Topic :: Office/Business',
         'Topic :: Software Development :: Libraries :: Python Modules'
     ]
@@ -0,0 +1,83 @@
+from marisol import Area, DocumentCache, Marisol, Redaction, StaticOverlay
+from marisol.backends import PyPDF2Backend, PypdfBackend, get_backend
+from marisol.marisol import GenericTextOverlay
+from PyPDF2 import PdfFileReader
+from tests.mocks import MockPDF
+
+import importlib.util
+import os
+import pickle
+import pytest
+
+
+no_pypdf = pytest.mark.skipif(importlib.util.find_spec("pypdf") is None, reason="pypdf is not installed")
+BACKENDS = ["pypdf2", pytest.param("pypdf", marks=no_pypdf)]
+
+
+def test_get_backend():
+    assert isinstance(get_backend(), PyPDF2Backend)
+    backend = PyPDF2Backend()
+    assert get_backend(backend) is backend
+    with pytest.raises(ValueError):
+        get_backend("pdfium")
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("options", [{}, {"append_only": True}, {"compress": 6}, {"incremental": True},
+                                     {"object_streams": True}, {"split": 2, "executor": "process"},
+                                     {"executor": "process"}])
+@pytest.mark.parametrize("cached", [False, True])
+def test_backend_save(backend, options, cached):
+    m = Marisol("BACK", 6, 1, cache=DocumentCache() if cached else None, backend=backend)
+    m.append(MockPDF(3))
+    m.append(MockPDF(1))
+    m[0].add_overlay(StaticOverlay("CONFIDENTIAL", Area.TOP_LEFT))
+    m[0][1].add_redaction(Redaction((100, 200), (200, 50), "PRIV"))
+    m[1].add_overlay(GenericTextOverlay("CUSTOM", Area.TOP_LEFT))  # drawn with reportlab
+    assert all(success for filename, success in m.save(**options))
+
+    with open("BACK000001.pdf", "rb") as in_file:
+        reader = PdfFileReader(in_file)
+        for num, page in enumerate(reader.pages):
+            assert "BACK00000{}".format(num + 1) in page.extractText()
+            assert "CONFIDENTIAL" in page.extractText()
+        assert "PRIV" in reader.getPage(1).extractText()
+    with open("BACK000004.pdf", "rb") as in_file:
+        text = PdfFileReader(in_file).getPage(0).extractText()
+        assert "BACK000004" in text
+        assert "CUSTOM" in text
+    os.remove("BACK000001.pdf")
+    os.remove("BACK000004.pdf")
+
+
+@no_pypdf
+def test_backend_pickle():
+    m = Marisol("BACK", 6, 1, backend="pypdf")
+    m.append(MockPDF(2))
+    document = pickle.loads(pickle.dumps(m[0]))
+    assert isinstance(document.backend, PypdfBackend)
+    assert (document[0].width, document[0].height) == (m[0][0].width, m[0][0].height)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("options", [{}, {"append_only": True}, {"compress": 6}, {"incremental": True}])
+def test_backend_save_forms(backend, options):
+    m = Marisol("FORM", 6, 1, backend=backend)
+    m.append(MockPDF(3))
+    m[0].add_overlay(StaticOverlay("CONFIDENTIAL", Area.TOP_LEFT))
+    for page in m[0]:
+        page.add_redaction(Redaction((100, 200), (200, 50), "PRIV"))
+    assert all(success for filename, success in m.save(forms=True, **options))
+
+    with open("FORM000001.pdf", "rb") as in_file:
+        reader = PdfFileReader(in_file)
+        forms = set()
+        for num, page in enumerate(reader.pages):
+            assert "FORM00000{}".format(num + 1) in page.extractText()
+            xobjects = page["/Resources"]["/XObject"]
+            forms.update((name, xobjects.raw_get(name).idnum) for name in xobjects)
+        assert {name for name, idnum in forms} == {"/MarisolForm0", "/MarisolForm1"}
+        assert len(forms) == 2  # each drawn once and shared by every page
+        assert "CONFIDENTIAL" in xobjects["/MarisolForm0"].getData().decode("cp1252")
+        assert "PRIV" in xobjects["/MarisolForm1"].getData().decode("cp1252")
+    os.remove("FORM000001.pdf")
@@ -0,0 +1,35 @@
+from marisol import DocumentCache
+from tests.mocks import MockPDF
+
+
+def test_cache_hits():
+    cache = DocumentCache()
+    first = MockPDF(1).read()
+    entry = cache.get(first)
+    assert cache.get(bytearray(first)) is entry
+    assert cache.get(MockPDF(2).read()) is not entry
+    assert (cache.hits, cache.misses, len(cache)) == (1, 2, 2)
+    assert str(cache) == "2 of 128 PDFs, 1 hits, 2 misses"
+    assert entry.reader.numPages == 1
+
+
+def test_cache_eviction():
+    cache = DocumentCache(2)
+    pdfs = [MockPDF(num).read() for num in (1, 2, 3)]
+    first = cache.get(pdfs[0])
+    cache.get(pdfs[1])
+    assert cache.get(pdfs[0]) is first  # now the most recently used
+    cache.get(pdfs[2])
+    assert len(cache) == 2
+    assert cache.get(pdfs[0]) is first
+    assert cache.misses == 3
+    cache.get(pdfs[1])  # was dropped
+    assert cache.misses == 4
+
+
+def test_cache_content():
+    entry = DocumentCache().get(MockPDF(2).read())
+    content = entry.content(1)
+    assert content.startswith(b"q\n")
+    assert content.endswith(b"Q\n")
+    assert entry.content(1) is content
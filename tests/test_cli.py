@@ -0,0 +1,70 @@
+from marisol.cli import expand, main, read_manifest
+from PyPDF2 import PdfFileReader
+from tests.mocks import MockPDF
+
+import json
+import os
+import pytest
+import subprocess
+import sys
+
+
+@pytest.fixture
+def inputs(tmpdir):
+    for name, pages in [("b.pdf", 3), ("a.pdf", 1), ("c.PDF", 2), ("notes.txt", 0)]:
+        with open(str(tmpdir.join(name)), "wb") as out_file:
+            out_file.write(MockPDF(pages).read() if pages else b"notes")
+    return tmpdir
+
+
+def test_cli_import():
+    code = "import marisol.cli, sys; print(sorted(m for m in ('PyPDF2', 'reportlab', 'multiprocessing') " \
+           "if m in sys.modules))"
+    assert subprocess.check_output([sys.executable, "-c", code]).strip() == b"[]"
+    assert subprocess.call([sys.executable, "-m", "marisol", "--help"], stdout=subprocess.DEVNULL) == 0
+
+
+def test_cli_expand(inputs):
+    directory = str(inputs)
+    assert expand([directory]) == [os.path.join(directory, name) for name in ["a.pdf", "b.pdf", "c.PDF"]]
+    assert expand([os.path.join(directory, "*.pdf"), "x.pdf"]) == [os.path.join(directory, "a.pdf"),
+                                                                   os.path.join(directory, "b.pdf"), "x.pdf"]
+
+
+def test_cli_main(inputs, capsys):
+    output = str(inputs.join("out"))
+    assert main([str(inputs), "-p", "CLI", "-f", "4", "-s", "10", "-o", output, "-w", "2"]) == 0
+    assert sorted(os.listdir(output)) == ["CLI0010.pdf", "CLI0011.pdf", "CLI0014.pdf"]
+    with open(os.path.join(output, "CLI0011.pdf"), "rb") as in_file:
+        assert "CLI0013" in PdfFileReader(in_file).getPage(2).extractText()
+    assert capsys.readouterr().out == "CLI0010 - CLI0015: 3 of 3 documents saved to {}\n".format(output)
+
+    assert main([str(inputs), "-p", "CLI", "-f", "4", "-s", "10", "-o", output]) == 1  # already saved
+    assert "CLI0010.pdf already exists" in capsys.readouterr().err
+
+    with pytest.raises(SystemExit):
+        main([str(inputs)])  # no prefix
+
+
+def test_cli_manifest(inputs, capsys):
+    manifest = str(inputs.join("jobs.jsonl"))
+    with open(manifest, "w") as out_file:
+        out_file.write("# two jobs\n\n")
+        out_file.write(json.dumps({"inputs": str(inputs.join("a.pdf")), "prefix": "ONE"}) + "\n")
+        out_file.write(json.dumps({"inputs": [str(inputs.join("b.pdf")), str(inputs.join("missing.pdf"))],
+                                   "prefix": "TWO", "area": "top-left", "start": 5}) + "\n")
+    jobs = read_manifest(manifest)
+    assert [job["prefix"] for job in jobs] == ["ONE", "TWO"]
+
+    output = str(inputs.join("out"))
+    assert main(["-m", manifest, "-o", output]) == 1  # the missing file fails
+    assert sorted(os.listdir(output)) == ["ONE000001.pdf", "TWO000005.pdf"]
+    captured = capsys.readouterr()
+    assert captured.out.splitlines() == ["ONE000001 - ONE000001: 1 of 1 documents saved to {}".format(output),
+                                         "TWO000005 - TWO000007: 1 of 2 documents saved to {}".format(output)]
+    assert "missing.pdf" in captured.err
+
+    with open(manifest, "w") as out_file:
+        out_file.write(json.dumps({"inputs": "a.pdf", "prefix": "ONE", "colour": "red"}) + "\n")
+    with pytest.raises(SystemExit):
+        main(["-m", manifest])
@@ -0,0 +1,46 @@
+from marisol import BatesIndex
+
+import pytest
+
+
+@pytest.fixture
+def index():
+    index = BatesIndex("TEST", 6)
+    for start, pages in [(10, 4), (14, 1), (15, 2), (30, 3)]:  # a gap after the third document, as in a shard
+        index.add(start, pages)
+    return index
+
+
+def test_index_add(index):
+    assert len(index) == 4
+    assert list(index.starts) == [10, 14, 15, 30]
+    assert list(index.lengths) == [4, 1, 2, 3]
+    with pytest.raises(ValueError):
+        index.add(31, 1)
+
+
+def test_index_parse(index):
+    assert index.parse("TEST000042") == 42
+    assert index.format(42) == "TEST000042"
+    for number in ["OTHER000042", "TEST", "TEST00004X", 42]:
+        with pytest.raises(KeyError):
+            index.parse(number)
+
+
+def test_index_locate(index):
+    assert index.locate("TEST000010") == (0, 0)
+    assert index.locate("TEST000013") == (0, 3)
+    assert index.locate("TEST000014") == (1, 0)
+    assert index.locate("TEST000016") == (2, 1)
+    assert index.locate("TEST000032") == (3, 2)
+    for number in ["TEST000009", "TEST000017", "TEST000033"]:
+        with pytest.raises(KeyError):
+            index.locate(number)
+
+
+def test_index_spans(index):
+    assert index.spans("TEST000012", "TEST000015") == [(0, 2, 4), (1, 0, 1), (2, 0, 1)]
+    assert index.spans("TEST000001", "TEST000099") == [(0, 0, 4), (1, 0, 1), (2, 0, 2), (3, 0, 3)]
+    assert index.spans("TEST000017", "TEST000030") == [(3, 0, 1)]
+    assert index.spans("TEST000020", "TEST000025") == []
+    assert index.spans("TEST000016", "TEST000012") == []
@@ -0,0 +1,61 @@
+from marisol import Journal
+
+import json
+import pytest
+
+
+@pytest.fixture
+def saved(tmpdir):
+    """journal with one recorded document"""
+    output = tmpdir.join("TEST000001.pdf")
+    output.write_binary(b"%PDF-1.3 test")
+    journal = Journal(str(tmpdir.join("journal.jsonl")))
+    journal.record("TEST000001", "TEST000003", str(output))
+    yield journal, output
+    journal.close()
+
+
+def test_journal_record(saved):
+    journal, output = saved
+    assert len(journal) == 1
+    assert "TEST000001" in journal
+    entry = journal["TEST000001"]
+    assert entry["end"] == "TEST000003"
+    assert entry["size"] == 13
+    assert len(entry["sha256"]) == 64
+
+    with open(journal.path) as in_file:
+        assert [json.loads(line) for line in in_file] == [entry]
+
+
+def test_journal_complete(saved):
+    journal, output = saved
+    assert journal.complete("TEST000001", "TEST000003", str(output))
+    assert not journal.complete("TEST000001", "TEST000004", str(output))  # different range
+    assert not journal.complete("TEST000004", "TEST000004", str(output))  # not recorded
+
+    output.write_binary(b"%PDF-1.3 tes")  # truncated
+    assert not journal.complete("TEST000001", "TEST000003", str(output))
+    output.write_binary(b"%PDF-1.3 TEST")  # same size, different content
+    assert not journal.complete("TEST000001", "TEST000003", str(output))
+    output.remove()
+    assert not journal.complete("TEST000001", "TEST000003", str(output))
+
+
+def test_journal_reload(saved, tmpdir):
+    journal, output = saved
+    journal.close()
+    with open(journal.path, "a") as out_file:
+        out_file.write('{"begin": "TEST000004", "end"')  # cut short by a crash
+
+    with Journal(journal.path) as reloaded:
+        assert len(reloaded) == 1
+        assert reloaded.complete("TEST000001", "TEST000003", str(output))
+
+        other = tmpdir.join("TEST000004.pdf")
+        other.write_binary(b"%PDF-1.3 other")
+        reloaded.record("TEST000004", "TEST000004", str(other))
+
+    with Journal(journal.path) as reloaded:
+        assert len(reloaded) == 2
+        assert reloaded.complete("TEST000004", "TEST000004", str(other))
@@ -0,0 +1,48 @@
+from marisol import LoadFile, Marisol
+from tests.mocks import MockPDF
+
+import pytest
+
+
+@pytest.fixture
+def documents():
+    m = Marisol("TEST", 6, 1, lazy=True)
+    for pages in [1, 3, 2]:
+        m.append(MockPDF(pages))
+    return m.documents
+
+
+def read(path, encoding="utf-8"):
+    with open(path, encoding=encoding, newline="") as in_file:
+        return in_file.read().split("\r\n")[:-1]
+
+
+def test_loadfile_order(documents, tmpdir):
+    dat, opt = str(tmpdir.join("out.dat")), str(tmpdir.join("out.opt"))
+    with LoadFile(dat, opt, directory="NATIVES\\") as load_file:
+        load_file.record(2, documents[2], "TEST000005.pdf")
+        load_file.record(1, documents[1], "TEST000002.pdf")
+        load_file.flush()
+        assert read(opt) == []  # held back until the first document is recorded
+        load_file.record(0, documents[0], "TEST000001.pdf")
+
+    rows = [row.split("\x14") for row in read(dat, "utf-8-sig")]
+    assert rows[0] == ["\xfeBEGBATES\xfe", "\xfeENDBATES\xfe", "\xfePAGECOUNT\xfe", "\xfeFILEPATH\xfe"]
+    assert [[field.strip("\xfe") for field in row] for row in rows[1:]] == [
+        ["TEST000001", "TEST000001", "1", "NATIVES\\TEST000001.pdf"],
+        ["TEST000002", "TEST000004", "3", "NATIVES\\TEST000002.pdf"],
+        ["TEST000005", "TEST000006", "2", "NATIVES\\TEST000005.pdf"]]
+    assert read(opt) == ["TEST000001,VOL001,NATIVES\\TEST000001.pdf,Y,,,1",
+                         "TEST000002,VOL001,NATIVES\\TEST000002.pdf,Y,,,3",
+                         "TEST000003,VOL001,NATIVES\\TEST000002.pdf,,,,",
+                         "TEST000004,VOL001,NATIVES\\TEST000002.pdf,,,,",
+                         "TEST000005,VOL001,NATIVES\\TEST000005.pdf,Y,,,2",
+                         "TEST000006,VOL001,NATIVES\\TEST000005.pdf,,,,"]
+
+
+def test_loadfile_unsaved(documents, tmpdir):
+    opt = str(tmpdir.join("out.opt"))
+    with LoadFile(opt=opt, volume="PROD01") as load_file:
+        load_file.record(0, documents[0], None)
+        load_file.record(2, documents[2], "TEST000005.pdf")  # written on close, the second never finished
+    assert read(opt) == ["TEST000005,PROD01,TEST000005.pdf,Y,,,2", "TEST000006,PROD01,TEST000005.pdf,,,,"]
@@ -1,9 +1,22 @@
-from marisol import Area, Document, Marisol, OutsideBoundariesError, Page, Redaction, RedactionStyle, StaticOverlay
+from marisol import Area, BatesOverlay, Document, DocumentCache, DocumentStats, Journal, LoadFile, Marisol, \
+    MemorySink, OutsideBoundariesError, Page, PyPDF2Backend, Redaction, RedactionImportError, RedactionStyle, \
+    StaticOverlay, ZipSink, stamp_cache_info
+from concurrent import futures
+from PyPDF2 import PdfFileReader
 from PyPDF2.pdf import PageObject
+from reportlab.pdfgen.canvas import Canvas
 from tests.mocks import MockPDF
 
+import asyncio
+import hashlib
+import io
+import mmap
 import os
+import pickle
 import pytest
+import threading
+import time
+import zipfile
 
 
 @pytest.fixture
@@ -56,6 +69,300 @@ def test_marisol_append(empty):
     os.remove("test.pdf")
 
 
+def test_marisol_lazy():
+    with open("test.pdf", "wb") as test_file:
+        test_file.write(MockPDF(5).read())
+
+    m = Marisol("TEST", 6, 1, lazy=True)
+    m.append(MockPDF(3)).append("test.pdf")
+    assert [str(doc) for doc in m.documents] == ["TEST000001 - TEST000003", "TEST000004 - TEST000008"]
+    for doc in m.documents:
+        assert doc.pages is None  # only the page count is known
+
+    m[1][4].add_redaction(Redaction((100, 200), (200, 50)))  # loads the pages of the second document
+    assert m[1].pages is not None
+
+    result = m.save()
+    assert result == [("TEST000001.pdf", True), ("TEST000004.pdf", True)]
+    assert m[0].pages is None  # released after saving
+    assert len(m[1][4].redactions) == 1  # loaded before saving, so kept
+
+    result = m.save(overwrite=True, executor="process", workers=2)
+    assert result == [("TEST000001.pdf", True), ("TEST000004.pdf", True)]
+
+    for filename in ["test.pdf", "TEST000001.pdf", "TEST000004.pdf"]:
+        os.remove(filename)
+
+
+def test_marisol_append_zero_copy():
+    with open("test.pdf", "wb") as test_file:
+        test_file.write(MockPDF(3).read())
+
+    m = Marisol("TEST", 6, 1, lazy=True)
+    m.append("test.pdf")
+    document = m[0]
+    document._load()
+    assert isinstance(document.file, mmap.mmap)  # lazy documents map their file while loaded
+    stream = document.file
+    document.save(incremental=True)
+    document._unload()
+    assert stream.closed
+    assert pickle.loads(pickle.dumps(document)).end == "TEST000003"
+
+    os.remove("test.pdf")
+    os.remove("TEST000001.pdf")
+
+
+def test_marisol_append_open_files(empty):
+    resource = pytest.importorskip("resource")
+    with open("test.pdf", "wb") as test_file:
+        test_file.write(MockPDF(1).read())
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(128, hard), hard))
+    try:
+        for num in range(200):  # more documents than file descriptors
+            empty.append("test.pdf")
+    finally:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+    assert not isinstance(empty[0].file, mmap.mmap)
+    assert len(empty) == 200
+    os.remove("test.pdf")
+
+
+def test_marisol_append_closed_file(empty):
+    with open("test.pdf", "wb") as test_file:
+        test_file.write(MockPDF(2).read())
+    with open("test.pdf", "rb") as in_file:
+        empty.append(in_file)
+    assert empty.save() == [("TEST000001.pdf", True)]  # the data was copied before the file was closed
+    for filename in ["test.pdf", "TEST000001.pdf"]:
+        os.remove(filename)
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_marisol_extend(lazy, executor):
+    names = ["one.pdf", "broken.pdf", "three.pdf", "five.pdf"]
+    for name, pages in zip(names, [1, 0, 3, 5]):
+        with open(name, "wb") as test_file:
+            test_file.write(MockPDF(pages).read() if pages else b"not a pdf")
+
+    m = Marisol("TEST", 6, 1, lazy=lazy)
+    failures = m.extend(names, workers=2, executor=executor)
+    assert [name for name, error in failures] == ["broken.pdf"]
+    assert isinstance(failures[0][1], Exception)
+
+    sequential = Marisol("TEST", 6, 1)
+    for name in ["one.pdf", "three.pdf", "five.pdf"]:
+        sequential.append(name)
+    assert [str(doc) for doc in m.documents] == [str(doc) for doc in sequential.documents]
+    assert m.number == sequential.number
+    assert all(doc.pages is None for doc in m.documents)  # counted, not parsed
+    assert [filename for filename, success in m.save()] == ["TEST000001.pdf", "TEST000002.pdf", "TEST000005.pdf"]
+
+    for name in names + ["TEST000001.pdf", "TEST000002.pdf", "TEST000005.pdf"]:
+        os.remove(name)
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_marisol_extend_wrong_count(lazy):
+    with open("wrong.pdf", "wb") as test_file:
+        test_file.write(MockPDF(3).read().replace(b"/Count 3", b"/Count 9"))  # same length, the xref still holds
+
+    m = Marisol("TEST", 6, 1, lazy=lazy)
+    assert m.extend(["wrong.pdf"]) == []
+    assert [str(doc) for doc in m.documents] == ["TEST000001 - TEST000003"]  # the pages in the tree, like append
+    assert [filename for filename, success in m.save()] == ["TEST000001.pdf"]
+
+    for name in ["wrong.pdf", "TEST000001.pdf"]:
+        os.remove(name)
+
+
+class _PagesSpy(PyPDF2Backend):
+    """Backend recording every page tree it reads."""
+
+    def __init__(self):
+        self.read_trees = []
+
+    def pages(self, reader):
+        pages = super(_PagesSpy, self).pages(reader)
+        self.read_trees.append(len(pages))
+        return pages
+
+
+def test_marisol_extend_skips_page_trees(tmpdir):
+    names = []
+    for num in range(20):
+        names.append(str(tmpdir.join("{}.pdf".format(num))))
+        with open(names[-1], "wb") as test_file:
+            test_file.write(MockPDF(5).read())
+
+    appended = Marisol("TEST", 6, 1, backend=_PagesSpy())
+    for name in names:
+        appended.append(name)
+    assert appended.backend.read_trees == [5] * 20
+
+    extended = Marisol("TEST", 6, 1, backend=_PagesSpy())
+    assert extended.extend(names, workers=2) == []
+    assert extended.backend.read_trees == []  # counted, each page tree is not read page by page
+    assert [str(doc) for doc in extended.documents] == [str(doc) for doc in appended.documents]
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_marisol_from_plan_changed(lazy):
+    for name in ["x.pdf", "y.pdf"]:
+        with open(name, "wb") as test_file:
+            test_file.write(MockPDF(2).read())
+    plan = Marisol("P", 4, 1).plan(["x.pdf", "y.pdf"])
+    with open("x.pdf", "wb") as test_file:
+        test_file.write(MockPDF(5).read())  # changed after planning, the numbers of y.pdf would overlap
+
+    if lazy:
+        (error, success), saved = Marisol.from_plan(plan, lazy=True).save()
+        assert isinstance(error, ValueError) and not success  # reported, the other documents are still saved
+        assert saved == ("P0003.pdf", True)
+    else:
+        with pytest.raises(ValueError):
+            Marisol.from_plan(plan)
+    assert not os.path.exists("P0001.pdf")
+    for name in ["x.pdf", "y.pdf", "P0003.pdf"]:
+        if os.path.exists(name):
+            os.remove(name)
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_marisol_from_plan(lazy, tmpdir):
+    names = ["one.pdf", "broken.pdf", "three.pdf", "five.pdf", "two.pdf"]
+    for name, pages in zip(names, [1, 0, 3, 5, 2]):
+        with open(name, "wb") as test_file:
+            test_file.write(MockPDF(pages).read() if pages else b"not a pdf")
+
+    plan = Marisol("TEST", 6, 1).plan(names, workers=2)
+    assert [name for name, error in plan.failures] == ["broken.pdf"]
+    plan.save(str(tmpdir.join("plan.json")))
+
+    single = Marisol("TEST", 6, 1)
+    for name in ["one.pdf", "three.pdf", "five.pdf", "two.pdf"]:
+        single.append(name)
+    expected = {}
+    for filename, success in single.save():
+        with open(filename, "rb") as in_file:
+            expected[filename] = in_file.read()
+        os.remove(filename)
+
+    produced = {}
+    for shard in range(3):
+        m = Marisol.from_plan(str(tmpdir.join("plan.json")), shard, 3, lazy=lazy)
+        assert m.number == 11
+        assert list(m.bates.starts) == [document.start for document in m.documents]
+        for filename, success in m.save():
+            assert filename not in produced  # shards do not overlap
+            with open(filename, "rb") as in_file:
+                produced[filename] = in_file.read()
+            os.remove(filename)
+    assert produced == expected  # byte-for-byte, with no gaps
+
+    with pytest.raises(ValueError):
+        Marisol.from_plan(plan, 3, 3)
+    for name in names:
+        os.remove(name)
+
+
+def test_marisol_add_redactions(populated):
+    rows = [{"bates": "TEST000001", "x": 10, "y": 20, "width": 30, "height": 40},
+            {"bates": "TEST000004", "x": "100", "y": "200", "width": "200", "height": "50", "text": "PRIV",
+             "style": "outline"},
+            {"bates": "TEST000009", "x": 0, "y": 0, "width": 10, "height": 10, "text": ""}]
+    assert populated.add_redactions(rows) == 3
+    assert len(populated[0][0].redactions) == 1
+    redaction = populated[1][2].redactions[0]
+    assert redaction.position == (100.0, 200.0)
+    assert redaction.size == (200.0, 50.0)
+    assert redaction.text == "PRIV"
+    assert redaction.style == RedactionStyle.OUTLINE
+    assert populated[2][4].redactions[0].text is None
+
+
+def test_marisol_add_redactions_errors(populated):
+    rows = [{"bates": "TEST000001", "x": 10, "y": 20, "width": 30, "height": 40},
+            {"bates": "TEST000010", "x": 10, "y": 20, "width": 30, "height": 40},  # past the last page
+            {"bates": "TEST000000", "x": 10, "y": 20, "width": 30, "height": 40},  # before the first page
+            {"bates": "OTHER00001", "x": 10, "y": 20, "width": 30, "height": 40},
+            {"bates": "TEST000002", "x": 600, "y": 20, "width": 30, "height": 40},
+            {"bates": "TEST000003", "x": "ten", "y": 20, "width": 30, "height": 40},
+            {"bates": "TEST000003", "x": 10, "y": 20, "width": 30, "height": 40, "style": "dotted"},
+            {"bates": "TEST000005", "x": 10, "y": 780, "width": 30, "height": 40},
+            {"bates": "TEST000003", "x": None, "y": 20, "width": 30, "height": 40},  # null in JSON
+            {"bates": "TEST000003", "x": 10, "y": 20, "width": 30, "height": 40, "style": 1}]
+    with pytest.raises(RedactionImportError) as error:
+        populated.add_redactions(rows)
+    assert [num for num, e in error.value.errors] == [2, 3, 4, 5, 6, 7, 8, 9, 10]
+    assert isinstance(error.value.errors[3][1], OutsideBoundariesError)
+    assert isinstance(error.value.errors[6][1], OutsideBoundariesError)
+    assert "9 redactions could not be added" in str(error.value)
+    assert not populated[0][0].redactions  # nothing is added
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_marisol_locate(lazy):
+    m = Marisol("TEST", 6, 1, lazy=lazy)
+    for pages in [1, 3, 5]:
+        m.append(MockPDF(pages))
+    assert list(m.bates.starts) == [1, 2, 5]
+    page = m.locate("TEST000006")
+    assert page.document is m[2]
+    assert page.number == "TEST000006"
+    with pytest.raises(KeyError):
+        m.locate("TEST000010")
+
+    pages = m.locate_range("TEST000003", "TEST000006")
+    assert [page.number for page in pages] == ["TEST000003", "TEST000004", "TEST000005", "TEST000006"]
+    assert [page.document for page in pages] == [m[1], m[1], m[2], m[2]]
+    assert m.locate_range("TEST000010", "TEST000020") == []
+
+
+def test_marisol_load_redactions(tmpdir):
+    m = Marisol("TEST", 6, 1, lazy=True)
+    m.append(MockPDF(2))
+    path = tmpdir.join("redactions.csv")
+    path.write("bates,x,y,width,height,text,style\nTEST000002,10,20,30,40,PRIV,\n")
+    assert m.load_redactions(str(path)) == 1
+    m.save()
+    with open("TEST000001.pdf", "rb") as in_file:
+        assert "PRIV" in PdfFileReader(in_file).getPage(1).extractText()
+    os.remove("TEST000001.pdf")
+
+
+@pytest.mark.parametrize("options", [{}, {"append_only": True}, {"incremental": True}])
+def test_marisol_cache(options):
+    cache = DocumentCache()
+    m = Marisol("TEST", 6, 1, cache=cache)
+    pdf = MockPDF(3).read()
+    for num in range(8):
+        m.append(io.BytesIO(pdf))
+    m.append(MockPDF(1))
+    assert (cache.hits, cache.misses) == (7, 2)
+    assert m[0].reader is m[7].reader
+
+    m[2].add_overlay(StaticOverlay("CONFIDENTIAL", Area.TOP_LEFT))
+    m[3][1].add_redaction(Redaction((100, 200), (200, 50), "TEST"))
+    result = m.save(**options)
+    assert all(success for filename, success in result)
+    for num, (filename, success) in enumerate(result[:8]):
+        with open(filename, "rb") as in_file:
+            reader = PdfFileReader(in_file)
+            assert reader.numPages == 3
+            for page_num, page in enumerate(reader.pages):
+                text = page.extractText()
+                assert "TEST{:06d}".format(num * 3 + page_num + 1) in text
+                assert ("CONFIDENTIAL" in text) == (num == 2)
+                assert "Page {} of 3".format(page_num + 1) in text
+
+    for filename, success in result:  # clean up
+        os.remove(filename)
+
+
 def test_marisol_getitem(populated):
     assert isinstance(populated[0], Document)
 
@@ -88,6 +395,336 @@ def test_marisol_save(populated):
         os.remove(filename)
 
 
+def test_marisol_save_process(populated):
+    populated[1].add_overlay(StaticOverlay("CONFIDENTIAL", Area.BOTTOM_LEFT))
+    populated[1][0].add_redaction(Redaction((100, 200), (200, 50), "TEST", RedactionStyle.OUTLINE))
+    result = populated.save(executor="process", workers=2)
+    assert result == [("TEST000001.pdf", True), ("TEST000002.pdf", True), ("TEST000005.pdf", True)]
+
+    result = populated.save(executor="process", workers=2)
+    for filename, success in result:
+        assert not success  # should fail because files exists already
+
+    for filename in ["TEST000001.pdf", "TEST000002.pdf", "TEST000005.pdf"]:  # clean up
+        os.remove(filename)
+
+    with pytest.raises(ValueError):
+        populated.save(executor="fiber")
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_marisol_save_stats(populated, executor):
+    populated[2][0].add_redaction(Redaction((100, 200), (200, 50), "TEST"))
+    finished = []
+    result, stats = populated.save(executor=executor, workers=2, stats=True, callback=finished.append)
+    assert result == [("TEST000001.pdf", True), ("TEST000002.pdf", True), ("TEST000005.pdf", True)]
+    assert sorted(document.begin for document in finished) == ["TEST000001", "TEST000002", "TEST000005"]
+    assert len(stats.documents) == 3
+    assert stats.counters["pages"] == 9
+    assert stats.counters["redactions"] == 1
+    assert stats.counters["bytes_written"] == sum(os.path.getsize(filename) for filename, success in result)
+    assert stats.counters["bytes_read"] > 0
+    for stage in ("queue", "load", "render", "merge", "write"):
+        assert stage in stats.timings
+    assert str(stats).startswith("3 documents, 9 pages in ")
+
+    document_stats = [document for document in stats.documents if document.begin == "TEST000005"][0]
+    assert [page.number for page in document_stats.pages] == ["TEST00000{}".format(num) for num in range(5, 10)]
+    assert document_stats.filename == "TEST000005.pdf"
+    assert document_stats.success
+    assert str(document_stats).startswith("TEST000005 - TEST000009: ")
+
+    result, stats = populated.save(stats=True)
+    assert [document.success for document in stats.documents] == [False, False, False]
+
+    for filename in ["TEST000001.pdf", "TEST000002.pdf", "TEST000005.pdf"]:  # clean up
+        os.remove(filename)
+
+
+def test_marisol_save_queue_time(populated, monkeypatch, tmpdir):
+    clock = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: clock[0])
+
+    class SlowJournal(Journal):
+        def complete(self, begin, end, filename):
+            clock[0] += 100  # checking a document against the journal takes a while
+            return False
+
+    finished = []
+    with SlowJournal(str(tmpdir.join("journal.jsonl"))) as journal:
+        populated.save(journal=journal, resume=True, callback=finished.append)
+    assert len(finished) == 3
+    assert all(stats.timings["queue"] == 0 for stats in finished)  # timed from the submit, not from the start
+
+    for filename in ["TEST000001.pdf", "TEST000002.pdf", "TEST000005.pdf"]:  # clean up
+        os.remove(filename)
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+@pytest.mark.parametrize("split", [None, 2])
+def test_marisol_save_journal_checksums(populated, executor, split, monkeypatch, tmpdir):
+    def read_back(filename):
+        raise AssertionError("{} was read back".format(filename))
+
+    with monkeypatch.context() as patched:
+        patched.setattr("marisol.journal._digest", read_back)  # the checksums are computed while writing
+        with Journal(str(tmpdir.join("journal.jsonl"))) as entries:
+            result = populated.save(executor=executor, workers=2, split=split, journal=entries)
+    assert all(success for filename, success in result)
+    for filename, success in result:
+        entry = entries[filename[:-len(".pdf")]]
+        with open(filename, "rb") as in_file:
+            data = in_file.read()
+        assert (entry["size"], entry["sha256"]) == (len(data), hashlib.sha256(data).hexdigest())
+        os.remove(filename)
+
+
+def test_marisol_save_resume(populated, tmpdir):
+    journal = str(tmpdir.join("journal.jsonl"))
+    result = populated.save(journal=journal)
+    assert result == [("TEST000001.pdf", True), ("TEST000002.pdf", True), ("TEST000005.pdf", True)]
+    with Journal(journal) as entries:
+        assert len(entries) == 3
+        assert entries["TEST000002"]["end"] == "TEST000004"
+
+    # lose the last document and cut another one short
+    os.remove("TEST000005.pdf")
+    with open("TEST000002.pdf", "r+b") as out_file:
+        out_file.truncate(100)
+    modified = os.path.getmtime("TEST000001.pdf")
+
+    finished = []
+    result = populated.save(journal=journal, resume=True, callback=finished.append)
+    assert result == [("TEST000001.pdf", True), ("TEST000002.pdf", True), ("TEST000005.pdf", True)]
+    assert sorted(document.begin for document in finished) == ["TEST000002", "TEST000005"]
+    assert os.path.getmtime("TEST000001.pdf") == modified  # skipped
+    assert PdfFileReader("TEST000002.pdf").numPages == 3
+    assert not [name for name in os.listdir(".") if name.endswith(".part")]
+
+    with pytest.raises(ValueError):
+        populated.save(resume=True)
+
+    for filename in ["TEST000001.pdf", "TEST000002.pdf", "TEST000005.pdf"]:  # clean up
+        os.remove(filename)
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_marisol_save_load_file(populated, executor, tmpdir):
+    dat, opt = str(tmpdir.join("out.dat")), str(tmpdir.join("out.opt"))
+    with open("TEST000002.pdf", "wb"):
+        pass  # not overwritten, so the second document fails
+    with LoadFile(dat, opt) as load_file:
+        populated.save(executor=executor, split=2, load_file=load_file)
+    with open(dat, encoding="utf-8-sig") as in_file:
+        assert [line.split("\x14")[0] for line in in_file] == ["\xfeBEGBATES\xfe", "\xfeTEST000001\xfe",
+                                                              "\xfeTEST000005\xfe"]
+    with open(opt) as in_file:
+        assert [line.split(",")[0] for line in in_file] == ["TEST000001"] + ["TEST00000{}".format(num)
+                                                                             for num in range(5, 10)]
+    for filename in ["TEST000001.pdf", "TEST000002.pdf", "TEST000005.pdf"]:
+        os.remove(filename)
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+@pytest.mark.parametrize("split", [None, 2])
+def test_marisol_save_sink(populated, executor, split):
+    expected = {}
+    for filename, success in populated.save(executor=executor, split=split):
+        with open(filename, "rb") as in_file:
+            expected[filename] = in_file.read()
+        os.remove(filename)
+
+    sink = MemorySink()
+    with sink.open("TEST000002.pdf") as out_file:
+        out_file.write(b"earlier")
+    results = populated.save(executor=executor, split=split, sink=sink)
+    assert results == [("TEST000001.pdf", True), ("EXISTS", False), ("TEST000005.pdf", True)]
+    assert sink.files == dict(expected, **{"TEST000002.pdf": b"earlier"})
+    assert not [name for name in os.listdir(".") if name.startswith("TEST")]
+
+    out_file = io.BytesIO()
+    with ZipSink(out_file) as sink:
+        populated.save(executor=executor, split=split, sink=sink)
+    with zipfile.ZipFile(out_file) as archive:
+        assert {name: archive.read(name) for name in archive.namelist()} == expected
+
+    with pytest.raises(ValueError):
+        populated.save(sink=MemorySink(), journal="journal.jsonl")
+
+
+def test_document_save_file_object(document):
+    out_file = io.BytesIO()
+    stats = DocumentStats(document.begin, document.end)
+    assert document.save(out_file, stats=stats) is out_file
+    assert stats.counters["bytes_written"] == len(out_file.getvalue())
+    assert PdfFileReader(out_file).numPages == 3
+    assert not os.path.exists("TEST000002.pdf")
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_marisol_save_split(populated, executor):
+    populated.append(MockPDF(12))
+    populated[3][4].add_redaction(Redaction((100, 200), (200, 50), "TEST"))
+    finished = []
+    result = populated.save(executor=executor, workers=2, split=5, callback=finished.append)
+    assert result == [("TEST000001.pdf", True), ("TEST000002.pdf", True), ("TEST000005.pdf", True),
+                      ("TEST000010.pdf", True)]
+    assert len(finished) == 4
+
+    split = [stats for stats in finished if stats.begin == "TEST000010"][0]
+    assert split.counters["pages"] == 12
+    assert split.counters["redactions"] == 1
+    assert [page.number for page in split.pages] == ["TEST{:06d}".format(num) for num in range(10, 22)]
+    assert split.counters["bytes_read"] == len(populated[3].file.getvalue())  # once, not once per range
+
+    with open("TEST000010.pdf", "rb") as in_file:
+        reader = PdfFileReader(in_file)
+        assert reader.numPages == 12
+        for num, page in enumerate(reader.pages):
+            assert "TEST{:06d}".format(num + 10) in page.extractText()
+        assert "TEST" in reader.getPage(4).extractText().replace("TEST000014", "")  # the redaction text
+
+    result = populated.save(executor=executor, workers=2, split=5)
+    assert [success for filename, success in result] == [False] * 4
+
+    for filename in ["TEST000001.pdf", "TEST000002.pdf", "TEST000005.pdf", "TEST000010.pdf"]:  # clean up
+        os.remove(filename)
+
+
+def test_marisol_save_split_threads(populated):
+    populated.append(MockPDF(12))
+    saved = []
+    populated._save_document = lambda document, submitted=None: saved.append(document.begin) or ("", True)
+    populated.save(split=5, threads=1)
+    assert saved == ["TEST000010", "TEST000005", "TEST000002", "TEST000001"]  # whole documents, not ranges
+
+
+def test_marisol_save_largest_first(populated):
+    started = []
+    populated._save_document = lambda document, submitted=None: started.append(document.begin) or ("", True)
+    populated.save(threads=1)
+    assert started == ["TEST000005", "TEST000002", "TEST000001"]
+
+
+def test_marisol_save_async(populated):
+    populated.append(MockPDF(1))
+    slow = Marisol("SLOW", 6, 1)
+    slow.append(MockPDF(300))
+
+    gate = threading.Event()
+    gated = futures.ThreadPoolExecutor(1)
+    gated.submit(gate.wait)  # the big document queues behind this until the small ones are done
+
+    async def save():
+        order = []
+        big = asyncio.ensure_future(slow[0].save_async(executor=gated))
+        async for document, filename, success in populated.save_async(executor="thread", workers=2):
+            assert success
+            assert filename == "{}.pdf".format(document.begin)
+            order.append(filename)
+        assert not big.done()  # the small documents did not wait for the big one
+        gate.set()
+        order.append(await big)
+        return order
+
+    with gated:
+        order = asyncio.run(save())
+    assert sorted(order[:4]) == ["TEST000001.pdf", "TEST000002.pdf", "TEST000005.pdf", "TEST000010.pdf"]
+    assert order[4] == "SLOW000001.pdf"
+
+    async def save_again(**kwargs):
+        return [result async for result in populated.save_async(**kwargs)]
+
+    assert [success for document, filename, success in asyncio.run(save_again(limit=1))] == [False] * 4
+    with pytest.raises(ValueError):
+        asyncio.run(save_again(executor="fiber"))
+
+    with pytest.raises(FileExistsError):
+        asyncio.run(slow[0].save_async())
+
+    for filename in order:  # clean up
+        os.remove(filename)
+
+
+def test_marisol_save_async_cancel(populated):
+    async def save():
+        results = populated.save_async(limit=1)
+        async for document, filename, success in results:
+            break
+        await results.aclose()
+        return filename
+
+    assert asyncio.run(save()) == "TEST000001.pdf"
+    assert not os.path.exists("TEST000002.pdf")  # never submitted
+    assert not os.path.exists("TEST000005.pdf")
+    os.remove("TEST000001.pdf")
+
+
+def test_document_pickle(document):
+    document.add_overlay(StaticOverlay("CONFIDENTIAL", Area.BOTTOM_LEFT))
+    document[1].add_redaction(Redaction((100, 200), (200, 50)))
+    clone = pickle.loads(pickle.dumps(document))
+    assert str(clone) == str(document)
+    assert isinstance(clone.overlays[Area.BOTTOM_LEFT], StaticOverlay)
+    assert len(clone[1].redactions) == 1
+    assert len(clone[0].redactions) == 0
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_marisol_save_missing_file(executor, tmpdir):
+    names = [str(tmpdir.join(name)) for name in ["one.pdf", "moved.pdf", "three.pdf"]]
+    for name, pages in zip(names, [1, 2, 3]):
+        with open(name, "wb") as test_file:
+            test_file.write(MockPDF(pages).read())
+    m = Marisol("TEST", 6, 1)
+    assert m.extend(names) == []
+    os.remove(names[1])  # moved after it was counted
+
+    with LoadFile(dat=str(tmpdir.join("load.dat"))) as load_file:
+        results = m.save(executor=executor, workers=2, load_file=load_file)
+    assert results[0] == ("TEST000001.pdf", True)
+    assert isinstance(results[1][0], FileNotFoundError) and not results[1][1]
+    assert results[2] == ("TEST000004.pdf", True)
+    with open(str(tmpdir.join("load.dat")), encoding="utf-8-sig") as dat:
+        assert [line.split("\x14")[0] for line in dat.read().splitlines()[1:]] == ["\xfeTEST000001\xfe",
+                                                                                  "\xfeTEST000004\xfe"]
+
+    results = m.save(split=1, executor=executor, workers=2, overwrite=True)
+    assert isinstance(results[1][0], FileNotFoundError) and not results[1][1]
+    assert results[2] == ("TEST000004.pdf", True)
+
+    streamed = Marisol("TEST", 6, 1)
+    (file, error, begin, end, success), = streamed.stream([names[1]], executor=executor)
+    assert file == names[1] and isinstance(error, FileNotFoundError) and not success
+    assert streamed.number == 0  # no numbers used up
+
+    for filename in ["TEST000001.pdf", "TEST000004.pdf"]:
+        os.remove(filename)
+
+
+def test_marisol_stream(populated):
+    with open("test.pdf", "wb") as test_file:
+        test_file.write(MockPDF(2).read())
+
+    inputs = [MockPDF(1), "test.pdf", MockPDF(4)]
+    results = list(populated.stream(iter(inputs), workers=2))
+    assert len(results) == 3
+    assert sorted((begin, end) for _, _, begin, end, _ in results) == [
+        ("TEST000010", "TEST000010"), ("TEST000011", "TEST000012"), ("TEST000013", "TEST000016")]
+    for file, filename, begin, end, success in results:
+        assert success
+        assert filename == begin + ".pdf"
+        assert file in inputs
+    assert len(populated) == 3  # streamed documents are not kept
+    assert populated.number == 16
+
+    results = list(Marisol("TEST", 6, 10).stream(["test.pdf"], executor="process"))
+    assert results == [("test.pdf", "EXISTS", "TEST000010", "TEST000011", False)]
+
+    for filename in ["test.pdf", "TEST000010.pdf", "TEST000011.pdf", "TEST000013.pdf"]:
+        os.remove(filename)
+
+
 def test_document_add_overlay(document):
     bl_overlay = StaticOverlay("TESTLEGEND", Area.BOTTOM_LEFT)
     document.add_overlay(bl_overlay)
@@ -122,6 +759,105 @@ def test_document_save(document):
     os.remove("ANOTHER.pdf")
 
 
+def test_document_save_append_only(document):
+    original = [page.page["/Contents"]._data for page in document.pages]
+    document[0].add_redaction(Redaction((100, 200), (200, 50), "PRIV"))
+    document.save("append.pdf", append_only=True)
+    with open("append.pdf", "rb") as in_file:
+        reader = PdfFileReader(in_file)
+        for num, page in enumerate(reader.pages):
+            contents = page["/Contents"]
+            assert contents[0].getObject().getData() == b"q\n"
+            assert contents[1].getObject()._data == original[num]  # passed through without re-encoding
+            assert "TEST00000{}".format(num+2) in page.extractText()
+            assert "/MarisolHelvetica" in page["/Resources"]["/Font"]
+        assert "PRIV" in reader.getPage(0).extractText()
+    os.remove("append.pdf")
+
+
+def test_document_save_incremental(document):
+    original = document.file.getvalue()
+    document.save("incremental.pdf", incremental=True)
+    with open("incremental.pdf", "rb") as in_file:
+        data = in_file.read()
+        assert data.startswith(original)  # original bytes are kept as they are
+        reader = PdfFileReader(in_file)
+        assert reader.numPages == 3
+        for num, page in enumerate(reader.pages):
+            assert "TEST00000{}".format(num+2) in page.extractText()
+    os.remove("incremental.pdf")
+
+
+def test_document_save_incremental_reportlab(document):
+    class BoxedOverlay(StaticOverlay):
+        def apply(self, c):
+            c.rect(10, 10, 100, 20)
+            super().apply(c)
+
+    document.add_overlay(BoxedOverlay("CUSTOM", Area.TOP_LEFT))
+    document.save("incremental.pdf", incremental=True)
+    with open("incremental.pdf", "rb") as in_file:
+        assert in_file.read().startswith(document.file.getvalue())  # merged pages can be updated too
+        reader = PdfFileReader(in_file)
+        assert "CUSTOM" in reader.getPage(0).extractText()
+    os.remove("incremental.pdf")
+
+
+def test_document_save_repeated(document):
+    document.save("first.pdf")
+    document.save("second.pdf")
+    with open("first.pdf", "rb") as first, open("second.pdf", "rb") as second:
+        assert first.read() == second.read()  # pages are not stamped twice
+    os.remove("first.pdf")
+    os.remove("second.pdf")
+
+
+@pytest.mark.parametrize("options", [{}, {"append_only": True}, {"incremental": True}])
+def test_document_save_shared_font(populated, options):
+    document = populated[2]  # five pages
+    document.save("shared.pdf", **options)
+    with open("shared.pdf", "rb") as in_file:
+        data = in_file.read()
+        # the font of the mock PDF itself, plus a single stamp font for all five pages
+        assert data.count(b"/BaseFont /Helvetica") == 2
+        reader = PdfFileReader(in_file)
+        fonts = {page["/Resources"]["/Font"].raw_get("/MarisolHelvetica").idnum for page in reader.pages}
+        assert len(fonts) == 1
+    os.remove("shared.pdf")
+
+
+@pytest.mark.parametrize("options", [{"compress": 6}, {"object_streams": True},
+                                     {"compress": 1, "object_streams": True, "append_only": True},
+                                     {"compress": 9, "incremental": True}])
+def test_document_save_compressed(document, options):
+    document.add_overlay(StaticOverlay("CONFIDENTIAL", Area.TOP_LEFT))
+    document[1].add_redaction(Redaction((100, 200), (200, 50), "PRIV"))
+    document.save("plain.pdf")
+    document.save("compressed.pdf", **options)
+    with open("compressed.pdf", "rb") as in_file:
+        data = in_file.read()
+        reader = PdfFileReader(in_file)
+        for num, page in enumerate(reader.pages):
+            text = page.extractText()
+            assert "CONFIDENTIAL" in text
+            assert "TEST00000{}".format(num + 2) in text
+        assert "PRIV" in reader.getPage(1).extractText()
+        if "compress" in options:
+            contents = reader.getPage(0)["/Contents"]
+            streams = [stream.getObject() for stream in contents] if isinstance(contents, list) else [contents]
+            assert any(stream.get("/Filter") == "/FlateDecode" for stream in streams)
+
+    if options.get("object_streams"):
+        assert data.startswith(b"%PDF-1.5")
+        assert b"/ObjStm" in data
+        assert b"/XRef" in data
+        assert b"\nxref\n" not in data
+    if "incremental" not in options:
+        assert len(data) < os.path.getsize("plain.pdf")
+    os.remove("plain.pdf")
+    os.remove("compressed.pdf")
+
+
 def test_document_str(populated):
     doc = next(populated)
     assert str(doc) == "TEST000001 - TEST000001"  # first document has one page
@@ -137,6 +873,65 @@ def test_page_apply(page):
     assert page.apply()
 
 
+def test_page_operators(page):
+    page.document.add_overlay(StaticOverlay("CONFIDENTIAL (AEO)", Area.TOP_LEFT))
+    page.add_redaction(Redaction((100, 200), (200, 50), "PRIV", RedactionStyle.OUTLINE))
+    operators = page._operators()
+    assert b"(CONFIDENTIAL \\(AEO\\)) Tj" in operators
+    assert b"(TEST000003) Tj" in operators
+    assert b"n 100 200 200 50 re B*" in operators
+
+    # text is placed where reportlab would draw it
+    overlay = BatesOverlay(page.number, Area.BOTTOM_RIGHT)
+    c = Canvas(None, pagesize=(page.width, page.height))
+    assert "1 0 0 1 {:g} 15 Tm".format(overlay.position(c)[0]).encode() in operators
+
+
+def test_page_operators_cached(document):
+    document.add_overlay(StaticOverlay("CONFIDENTIAL", Area.TOP_LEFT))
+    for page in document.pages:
+        page.add_redaction(Redaction((100, 200), (200, 50), "PRIV"))
+    document[0]._operators()
+    before = stamp_cache_info()
+    parts = [page._parts() for page in document.pages]
+    after = stamp_cache_info()
+    assert after["hits"] - before["hits"] == 2 * len(document)
+    assert after["misses"] == before["misses"]
+    assert after["hit_rate"] > before["hit_rate"]
+    assert [shared for part, shared in parts[0]] == [True, False, True]  # only the bates number is drawn per page
+    assert parts[0][0][0] is parts[1][0][0]
+
+
+def test_page_operators_fallback(page):
+    class BoxedOverlay(StaticOverlay):
+        def apply(self, c):
+            c.rect(10, 10, 100, 20)
+            super().apply(c)
+
+    page.document.add_overlay(BoxedOverlay("CUSTOM", Area.TOP_LEFT))
+    assert page._operators() is None  # custom overlays are drawn with reportlab
+    assert page.apply()
+
+
+def test_document_save_text(document):
+    document.add_overlay(StaticOverlay("CONFIDENTIAL", Area.TOP_LEFT))
+    document.save("text.pdf")
+    with open("text.pdf", "rb") as in_file:
+        reader = PdfFileReader(in_file)
+        for num, page in enumerate(reader.pages):
+            text = page.extractText()
+            assert "CONFIDENTIAL" in text
+            assert "TEST00000{}".format(num+2) in text
+    os.remove("text.pdf")
+
+
+def test_page_slots(page):
+    assert not hasattr(page, "__dict__")  # lightweight record, no per-page canvas
+    assert not hasattr(page, "canvas")
+    with pytest.raises(AttributeError):
+        page.canvas = None
+
+
 def test_redaction_default(document):
     p = document[0]
     r = Redaction((100, 200),  (200, 200), "BLAH")
@@ -0,0 +1,40 @@
+from marisol import Plan
+
+import pytest
+
+
+@pytest.fixture
+def plan():
+    plan = Plan("TEST", 6, 10)
+    for num, pages in enumerate([4, 1, 1, 2, 8, 1, 3]):
+        plan.add("doc{}.pdf".format(num), pages)
+    return plan
+
+
+def test_plan_add(plan):
+    assert len(plan) == 7
+    assert plan.pages == 20
+    assert plan.documents[0]["begin"] == "TEST000010"
+    assert plan.documents[0]["end"] == "TEST000013"
+    assert plan.documents[1]["start"] == 14
+    assert plan.documents[-1]["end"] == "TEST000029"
+
+
+@pytest.mark.parametrize("shards", [1, 2, 3, 7, 10])
+def test_plan_shard(plan, shards):
+    sharded = [plan.shard(shard, shards) for shard in range(shards)]
+    assert [document for shard in sharded for document in shard] == plan.documents  # consecutive, no gaps or overlaps
+    with pytest.raises(ValueError):
+        plan.shard(shards, shards)
+
+
+def test_plan_shard_balanced(plan):
+    assert [sum(document["pages"] for document in plan.shard(shard, 2)) for shard in range(2)] == [8, 12]
+
+
+def test_plan_save(plan, tmpdir):
+    path = str(tmpdir.join("plan.json"))
+    plan.save(path)
+    loaded = Plan.load(path)
+    assert (loaded.prefix, loaded.fill, loaded.start) == ("TEST", 6, 10)
+    assert loaded.documents == plan.documents
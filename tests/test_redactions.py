@@ -0,0 +1,36 @@
+from marisol import redactions
+from marisol.redactions import outside_boundaries, read_redactions
+
+import io
+import pytest
+
+
+def test_read_redactions_csv(tmpdir):
+    path = tmpdir.join("redactions.csv")
+    path.write("bates,x,y,width,height,text,style\nTEST000001,10,20,30,40,PRIV,outline\nTEST000002,1,2,3,4,,\n")
+    rows = read_redactions(str(path))
+    assert rows[0] == {"bates": "TEST000001", "x": "10", "y": "20", "width": "30", "height": "40", "text": "PRIV",
+                       "style": "outline"}
+    assert rows[1]["text"] == ""
+
+
+def test_read_redactions_json():
+    rows = read_redactions(io.StringIO('[{"bates": "TEST000001", "x": 10, "y": 20, "width": 30, "height": 40}]'),
+                           "json")
+    assert rows == [{"bates": "TEST000001", "x": 10, "y": 20, "width": 30, "height": 40}]
+
+    with pytest.raises(ValueError):
+        read_redactions(io.StringIO(""), "xml")
+
+
+@pytest.mark.parametrize("numpy", [True, False])
+def test_outside_boundaries(monkeypatch, numpy):
+    if not numpy:
+        monkeypatch.setattr(redactions, "numpy", None)
+    elif redactions.numpy is None:
+        pytest.skip("numpy is not installed")
+
+    boxes = [(0, 0, 612, 792), (600, 0, 13, 10), (0, 700, 10, 93), (100, 100, 10, 10)]
+    pages = [(612, 792)] * 4
+    assert outside_boundaries(boxes, pages) == [1, 2]
+    assert outside_boundaries([], []) == []
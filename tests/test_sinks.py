@@ -0,0 +1,106 @@
+from marisol import DirectorySink, MemorySink, TarSink, ZipSink
+
+import hashlib
+import io
+import os
+import pytest
+import tarfile
+import threading
+import zipfile
+
+
+def test_directory_sink(tmpdir):
+    sink = DirectorySink(str(tmpdir))
+    assert not sink.exists("one.pdf")
+    with sink.open("one.pdf") as out_file:
+        out_file.write(b"%PDF")
+        assert not sink.exists("one.pdf")  # written to a temporary file until complete
+    assert sink.exists("one.pdf")
+    with open(os.path.join(str(tmpdir), "one.pdf"), "rb") as in_file:
+        assert in_file.read() == b"%PDF"
+
+    with pytest.raises(RuntimeError):
+        with sink.open("two.pdf"):
+            raise RuntimeError
+    assert os.listdir(str(tmpdir)) == ["one.pdf"]
+
+
+def test_directory_sink_checksum(tmpdir):
+    sink = DirectorySink(str(tmpdir))
+    with sink.open("one.pdf") as out_file:
+        out_file.write(b"%PDF")
+        out_file.write(memoryview(b"-1.3"))
+        assert out_file.tell() == 8
+    assert sink.checksum("one.pdf") == (8, hashlib.sha256(b"%PDF-1.3").hexdigest())
+    assert sink.checksum("one.pdf") is None  # taken
+
+    with sink.open("two.pdf") as out_file:
+        out_file.write(b"%PDF-1.3")
+        out_file.seek(0)
+        out_file.write(b"%FDP")
+    assert sink.checksum("two.pdf") is None  # not known once rewritten
+
+
+def test_memory_sink():
+    sink = MemorySink()
+    with sink.open("one.pdf") as out_file:
+        out_file.write(b"%PDF")
+    with pytest.raises(RuntimeError):
+        with sink.open("two.pdf") as out_file:
+            out_file.write(b"%P")
+            raise RuntimeError
+    assert "one.pdf" in sink
+    assert not sink.exists("two.pdf")
+    assert sink["one.pdf"] == b"%PDF"
+
+
+class Unseekable(io.RawIOBase):
+
+    def __init__(self):
+        self.data = io.BytesIO()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        return self.data.write(data)
+
+
+@pytest.mark.parametrize("kind", ["zip", "tar"])
+def test_archive_sink(kind):
+    out_file = Unseekable()
+    names = ["{:03d}.pdf".format(num) for num in range(50)]
+
+    def write(name):
+        with sink.open(name) as document:
+            document.write(name.encode() * 100)
+
+    with (ZipSink(out_file) if kind == "zip" else TarSink(out_file, "gz")) as sink:
+        threads = [threading.Thread(target=write, args=(name, )) for name in names]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert sink.exists("007.pdf")
+
+    data = io.BytesIO(out_file.data.getvalue())
+    if kind == "zip":
+        with zipfile.ZipFile(data) as archive:
+            assert sorted(archive.namelist()) == names
+            assert archive.read("007.pdf") == b"007.pdf" * 100
+    else:
+        with tarfile.open(fileobj=data) as archive:
+            assert sorted(archive.getnames()) == names
+            assert archive.extractfile("007.pdf").read() == b"007.pdf" * 100
+
+
+@pytest.mark.parametrize("compression", [zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED])
+def test_zip_sink_compression(compression):
+    data = io.BytesIO()
+    with ZipSink(data, compression) as sink:
+        with sink.open("001.pdf") as document:
+            document.write(b"001.pdf" * 100)
+
+    with zipfile.ZipFile(io.BytesIO(data.getvalue())) as archive:
+        assert archive.getinfo("001.pdf").compress_type == compression
+        assert archive.read("001.pdf") == b"001.pdf" * 100